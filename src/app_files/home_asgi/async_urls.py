@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import async_views
+
+app_name = "home_async"
+
+urlpatterns = [
+    path("users/", async_views.user_list, name="user_list"),
+    path("users/<int:pk>/", async_views.user_detail, name="user_detail"),
+    path("events/", async_views.user_events, name="user_events"),
+]
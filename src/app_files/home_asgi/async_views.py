@@ -0,0 +1,89 @@
+"""
+Async views, served without a thread per request when the project runs under ASGI.
+
+The ORM calls use the async API ('aget()', 'acount()', 'async for'), a view waiting on the
+database or on 'asyncio.sleep()' doesn't hold a worker. 'user_events' is a long-lived
+Server-Sent Events stream, e.g. for htmx's SSE extension:
+
+    <div hx-ext="sse" sse-connect="/async/events/" sse-swap="users"></div>
+
+They expose the users, so they are only available with DEBUG or to staff users.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+
+User = get_user_model()
+
+# Seconds between two events, and how long a stream stays open before the client reconnects
+EVENTS_INTERVAL = 2
+EVENTS_DURATION = 300
+
+
+async def check_access(request):
+    """Raise Http404 unless DEBUG is on or the user is staff."""
+    if settings.DEBUG:
+        return
+
+    # 'auser()' loads the user without blocking the event loop, before Django 5.0 'request.user' is loaded in a thread
+    if hasattr(request, "auser"):
+        is_staff = (await request.auser()).is_staff
+    else:
+        is_staff = await sync_to_async(lambda: request.user.is_staff)()
+
+    if not is_staff:
+        raise Http404
+
+
+def user_data(user):
+    return {
+        "id": user.pk,
+        "username": user.get_username(),
+        "date_joined": user.date_joined.isoformat() if hasattr(user, "date_joined") else None,
+    }
+
+
+async def user_list(request):
+    """The number of users and the last ones who joined, '?limit=' of them (default 20, at most 100)."""
+    await check_access(request)
+
+    try:
+        limit = min(max(int(request.GET.get("limit", 20)), 1), 100)
+    except ValueError:
+        return JsonResponse({"error": "'limit' must be an integer."}, status=400)
+
+    users = [user_data(user) async for user in User.objects.order_by("-pk")[:limit]]
+    return JsonResponse({"count": await User.objects.acount(), "users": users})
+
+
+async def user_detail(request, pk):
+    await check_access(request)
+
+    try:
+        user = await User.objects.aget(pk=pk)
+    except User.DoesNotExist:
+        raise Http404("No such user.")
+
+    return JsonResponse(user_data(user))
+
+
+async def user_events(request):
+    """Send the number of users as a 'users' event every few seconds."""
+    await check_access(request)
+
+    async def events():
+        # The client reconnects after the stream ends, 'retry' is how long it waits in milliseconds
+        yield f"retry: {EVENTS_INTERVAL * 1000}\n\n"
+        for _ in range(EVENTS_DURATION // EVENTS_INTERVAL):
+            count = await User.objects.acount()
+            yield f"event: users\ndata: <span>{count} users</span>\n\n"
+            await asyncio.sleep(EVENTS_INTERVAL)
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Tell nginx not to buffer the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,184 @@
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+# What the last build produced, next to the 'staticfiles.json' manifest
+BUILD_MANIFEST_NAME = ".buildassets.json"
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".mjs", ".map", ".json", ".svg", ".txt", ".xml", ".html", ".ttf", ".otf", ".eot")
+
+# Smaller files don't gain anything from compression, and a copy that isn't
+# at least 5% smaller isn't worth a second request variant.
+MIN_COMPRESS_SIZE = 256
+MAX_COMPRESSED_RATIO = 0.95
+
+
+def minify(path, content):
+    if path.endswith(".css") and rcssmin is not None:
+        return rcssmin.cssmin(content.decode("utf-8")).encode("utf-8")
+    if path.endswith((".js", ".mjs")) and rjsmin is not None:
+        return rjsmin.jsmin(content.decode("utf-8")).encode("utf-8")
+    return content
+
+
+def write_file(path, content):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def write_compressed(path, content, compressed):
+    """Keep 'compressed' at 'path' if it's worth it, otherwise remove a previous one."""
+    if len(compressed) <= len(content) * MAX_COMPRESSED_RATIO:
+        write_file(path, compressed)
+        return True
+
+    if os.path.exists(path):
+        os.remove(path)
+    return False
+
+
+def build_file(job):
+    """
+    Minify a fingerprinted file in place and write its '.gz' and '.br' copies.
+
+    Runs in a worker process. 'collectstatic' writes the fingerprinted CSS and JavaScript
+    again on every run, when the minified content is the same as in the previous build
+    the compressed copies are still up to date and only the minified file is written back.
+
+    Args:
+        job (tuple): The file path and what the previous build recorded about it, or None.
+
+    Returns:
+        dict: What the build manifest keeps about the file, and whether it was compressed.
+    """
+    path, previous = job
+    with open(path, "rb") as f:
+        content = f.read()
+
+    try:
+        minified = minify(path, content)
+    except UnicodeDecodeError:
+        minified = content
+    if minified != content:
+        write_file(path, minified)
+
+    sha256 = hashlib.sha256(minified).hexdigest()
+    if previous is not None and previous["sha256"] == sha256 \
+            and all(os.path.exists(path + suffix) for suffix in previous["outputs"]):
+        return {**previous, "mtime": os.stat(path).st_mtime_ns, "compressed": False}
+
+    outputs = []
+    if path.endswith(COMPRESSIBLE_EXTENSIONS) and len(minified) >= MIN_COMPRESS_SIZE:
+        # 'mtime=0' so the same input always gives the same output
+        if write_compressed(f"{path}.gz", minified, gzip.compress(minified, compresslevel=9, mtime=0)):
+            outputs.append(".gz")
+        if brotli is not None and write_compressed(f"{path}.br", minified, brotli.compress(minified, quality=11)):
+            outputs.append(".br")
+
+    return {
+        "mtime": os.stat(path).st_mtime_ns,
+        "sha256": sha256,
+        "size": len(content),
+        "minified_size": len(minified),
+        "outputs": outputs,
+        "compressed": True,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Collect the static files with their content hash in the name, then minify the CSS and JavaScript "
+        "and pre-compress everything with gzip and Brotli. Only the files changed since the last build are processed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count(),
+            help="Processes minifying and compressing the files. Default is the number of CPUs.",
+        )
+        parser.add_argument("--force", action="store_true", help="Process every file again.")
+
+    def handle(self, *args, **options):
+        # Copies what changed since the last run and fingerprints it, see 'ManifestStaticFilesStorage'
+        call_command("collectstatic", interactive=False, verbosity=max(options["verbosity"] - 1, 0))
+
+        static_root = settings.STATIC_ROOT
+        build_manifest_path = os.path.join(static_root, BUILD_MANIFEST_NAME)
+        previous = {}
+        if not options["force"]:
+            try:
+                with open(build_manifest_path, "r") as f:
+                    previous = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+        names = self.fingerprinted_names(static_root)
+        built, pending = {}, []
+
+        for name in names:
+            path = os.path.join(static_root, name)
+            entry = previous.get(name)
+
+            # Untouched since the last build
+            if entry is not None and entry["mtime"] == os.stat(path).st_mtime_ns \
+                    and all(os.path.exists(path + suffix) for suffix in entry["outputs"]):
+                built[name] = entry
+            else:
+                pending.append(name)
+
+        compressed = []
+        if pending:
+            jobs = [(os.path.join(static_root, name), previous.get(name)) for name in pending]
+            with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+                for name, entry in zip(pending, executor.map(build_file, jobs, chunksize=8)):
+                    if entry.pop("compressed"):
+                        compressed.append(name)
+                    built[name] = entry
+
+        write_file(build_manifest_path, json.dumps(built, indent=2, sort_keys=True).encode("utf-8"))
+
+        saved = sum(entry["size"] - entry["minified_size"] for entry in built.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(names)} static files, {len(pending)} minified and {len(compressed)} compressed, "
+            f"{saved / 1024:.1f} KiB saved by minification."
+        ))
+        if brotli is None:
+            self.stdout.write(self.style.WARNING("Brotli isn't installed, only the '.gz' copies were written."))
+
+    def fingerprinted_names(self, static_root):
+        """The files to serve: the hashed names from the 'staticfiles.json' manifest, every file otherwise."""
+        manifest_name = getattr(staticfiles_storage, "manifest_name", None)
+        if manifest_name is not None:
+            with open(os.path.join(static_root, manifest_name), "r") as f:
+                return sorted(set(json.load(f)["paths"].values()))
+
+        names = []
+        for root, _, files in os.walk(static_root):
+            for filename in files:
+                if not filename.endswith((".gz", ".br")) and filename != BUILD_MANIFEST_NAME:
+                    names.append(os.path.relpath(os.path.join(root, filename), static_root))
+        return sorted(names)
@@ -0,0 +1,23 @@
+import os
+
+from django.conf import settings
+from django.templatetags.static import static
+from django.urls import reverse
+from jinja2 import Environment, FileSystemBytecodeCache
+
+
+def environment(**options):
+    """
+    The Jinja2 environment of the project, with Django's 'static' and 'url' helpers.
+
+    Outside DEBUG the compiled templates are also kept in 'cache/jinja2', so a new worker
+    process doesn't compile them again.
+    """
+    if not settings.DEBUG:
+        cache_dir = os.path.join(settings.ROOT_DIR, "cache", "jinja2")
+        os.makedirs(cache_dir, exist_ok=True)
+        options.setdefault("bytecode_cache", FileSystemBytecodeCache(cache_dir))
+
+    env = Environment(**options)
+    env.globals.update({"static": static, "url": reverse})
+    return env
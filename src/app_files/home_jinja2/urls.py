@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import benchmark
+
+app_name = "home"
+
+urlpatterns = [
+    path("benchmark/templates/", benchmark.template_benchmark, name="template_benchmark"),
+]
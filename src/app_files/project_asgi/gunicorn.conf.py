@@ -0,0 +1,32 @@
+"""
+Gunicorn settings for serving the project over ASGI, with uvicorn workers.
+
+Gunicorn reads this file from the current directory, so 'gunicorn' alone starts the project. An async worker handles many
+concurrent requests on its event loop, so one worker per CPU is enough, unlike the
+'2 * CPUs + 1' of sync workers. Set WEB_CONCURRENCY to override the worker count.
+"""
+import os
+
+
+def cpu_count():
+    # The CPUs this process may run on, fewer than 'os.cpu_count()' in a container limited with cpusets
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+wsgi_app = "{{ project_name }}.asgi:application"
+bind = os.getenv("ASGI_BIND", "127.0.0.1:8000")
+worker_class = "uvicorn_worker.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", cpu_count()))
+
+# Keep connections open between the requests of a client, longer than a load balancer's idle timeout
+keepalive = 75
+# Restart the workers once in a while, at different times, to bound memory growth
+max_requests = 10000
+max_requests_jitter = 1000
+# Long-lived requests, like the 'events' stream, get that long to finish on a restart
+graceful_timeout = 30
+
+accesslog = "-"
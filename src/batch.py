@@ -0,0 +1,167 @@
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from script import EditSettings, Logger
+from scaffold import start_project
+
+
+def load_manifest(manifestPath: str) -> list:
+    """
+    Load the JSON manifest of the projects to generate.
+
+    The manifest is a list of objects with the same options as the 'script.py' arguments:
+
+        [{"projectName": "blog", "dbType": "postgre", "databaseDict": {"default": ""}, "htmx": "true", "smtp": "false"}]
+
+    'projectRoot' defaults to '<manifest dir>/<projectName>' and 'settingsPath' to
+    '<projectRoot>/root/settings.py'. Relative paths are resolved against the manifest's directory.
+    'dbPooling' is '', 'app' or 'pgbouncer', like '--db-pooling' and '--pgbouncer'. 'cache' is ''
+    or one of the '--cache' backends, 'patch', 'jinja2', 'assets' and 'asgi' are true or false like the options of the same name.
+
+    Args:
+        manifestPath (str): Path to the JSON manifest.
+
+    Returns:
+        list: One dict per project, with every option filled in.
+    """
+    with open(manifestPath, 'r') as f:
+        entries = json.load(f)
+
+    manifestDir = os.path.dirname(os.path.abspath(manifestPath))
+    projects = []
+
+    for entry in entries:
+        projectName = entry['projectName']
+        if any(project['projectName'] == projectName for project in projects):
+            raise ValueError(f"Project '{projectName}' is in the manifest twice.")
+
+        projectRoot = os.path.join(
+            manifestDir, entry.get('projectRoot', projectName))
+
+        projects.append({
+            'projectName': projectName,
+            'projectRoot': projectRoot,
+            'settingsPath': os.path.join(projectRoot, entry.get('settingsPath', 'root/settings.py')),
+            'dbType': entry.get('dbType', ''),
+            'databaseDict': entry.get('databaseDict', {"default": ""}),
+            'htmx': str(entry.get('htmx', 'false')).lower(),
+            'smtp': str(entry.get('smtp', 'false')).lower(),
+            'patch': str(entry.get('patch', 'false')).lower() == 'true',
+            'dbPooling': entry.get('dbPooling', ''),
+            'cache': entry.get('cache', ''),
+            'jinja2': str(entry.get('jinja2', 'false')).lower() == 'true',
+            'assets': str(entry.get('assets', 'false')).lower() == 'true',
+            'asgi': str(entry.get('asgi', 'false')).lower() == 'true',
+        })
+
+    return projects
+
+
+def generate_project(project: dict) -> dict:
+    """
+    Create the Django project in-process if needed and edit its settings, like the 'django-venv' driver does.
+
+    Every path is resolved against 'project['projectRoot']', so several projects can be
+    generated at the same time from the same working directory.
+
+    Returns:
+        dict: The project name, whether it succeeded, the error if any and the wall time in seconds.
+    """
+    start = time.perf_counter()
+    projectRoot = project['projectRoot']
+    result = {'projectName': project['projectName'], 'ok': True, 'error': None}
+
+    try:
+        os.makedirs(projectRoot, exist_ok=True)
+        open(os.path.join(projectRoot, '.env'), 'a').close()
+
+        if not os.path.exists(project['settingsPath']):
+            start_project(os.path.basename(os.path.dirname(project['settingsPath'])),
+                          os.path.dirname(os.path.dirname(project['settingsPath'])))
+
+        editor = EditSettings(projectName=project['projectName'], settingsPath=project['settingsPath'],
+                              dbType=project['dbType'], databaseDict=project['databaseDict'],
+                              htmx=project['htmx'], smtp=project['smtp'], projectRoot=projectRoot,
+                              logFileName=os.path.join(projectRoot, 'script.log'), patch=project['patch'],
+                              dbPooling=project['dbPooling'],
+                              cache=project['cache'], jinja2=project['jinja2'],
+                              assets=project['assets'], asgi=project['asgi'])
+        try:
+            editor.edit()
+        finally:
+            # Pool workers are reused, don't leave this project's log file attached.
+            editor.close()
+
+    except Exception as e:
+        result['ok'] = False
+        result['error'] = f"{e!r}"
+
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def generate_projects(projects: list, logger: Logger, maxWorkers: int = None) -> list:
+    """
+    Generate 'projects' concurrently on a process pool.
+
+    Args:
+        projects (list): Projects as returned by 'load_manifest()'.
+        logger (Logger): Logger instance
+        maxWorkers (int): Size of the pool. Default is the CPU count.
+
+    Returns:
+        list: The 'generate_project()' results, in manifest order.
+    """
+    maxWorkers = maxWorkers or os.cpu_count() or 1
+    results = {}
+
+    with ProcessPoolExecutor(max_workers=min(maxWorkers, max(len(projects), 1))) as executor:
+        futures = {executor.submit(generate_project, project): project['projectName']
+                   for project in projects}
+
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+
+            if result['ok']:
+                logger.log_info(
+                    f"Generated '{result['projectName']}' in {result['seconds']:.2f}s.")
+            else:
+                logger.log_error(
+                    f"Failed to generate '{result['projectName']}': {result['error']}")
+
+    return [results[project['projectName']] for project in projects]
+
+
+def log_summary(results: list, wallTime: float, logger: Logger) -> None:
+    """Log the time spent on each project and the overall wall time."""
+    width = max([len(result['projectName']) for result in results] + [7])
+
+    logger.log_info("Summary:")
+    logger.log_info(f"{'Project'.ljust(width)}  {'Status':6}  Seconds")
+    for result in results:
+        status = 'ok' if result['ok'] else 'failed'
+        logger.log_info(
+            f"{result['projectName'].ljust(width)}  {status:6}  {result['seconds']:.2f}")
+
+    totalTime = sum(result['seconds'] for result in results)
+    logger.log_info(
+        f"{len(results)} projects in {wallTime:.2f}s (sum of project times: {totalTime:.2f}s).")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python batch.py <manifest.json>")
+        sys.exit(1)
+
+    logger = Logger()
+    projects = load_manifest(sys.argv[1])
+
+    start = time.perf_counter()
+    results = generate_projects(projects, logger)
+    log_summary(results, time.perf_counter() - start, logger)
+
+    if not all(result['ok'] for result in results):
+        sys.exit(1)
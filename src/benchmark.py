@@ -0,0 +1,214 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from formatter import yapfFormatter
+from rewriter import SettingsRewriter
+from scaffold import Scaffold, start_project
+from script import EditSettings
+
+# Parsing with comments grows quadratically with the number of statements, larger inputs take hours: pass them to '--sizes'.
+DEFAULT_SIZES = [0, 1000, 10000]
+
+
+def stock_settings() -> str:
+    """Return the settings.py 'django-admin startproject' creates with the installed Django."""
+    with tempfile.TemporaryDirectory() as projectRoot:
+        start_project('root', projectRoot)
+        with open(os.path.join(projectRoot, 'root', 'settings.py'), 'r') as f:
+            return f.read()
+
+
+def synthetic_settings(baseSource: str, assignments: int) -> str:
+    """
+    Append 'assignments' top-level settings to 'baseSource', with comments, like a large project's settings.
+
+    The content only depends on 'assignments', so runs on different machines edit the same file.
+    """
+    lines = [baseSource.rstrip('\n'), '']
+
+    for index in range(assignments):
+        if index % 10 == 0:
+            lines.append(f"# Settings group {index // 10}")
+
+        kind = index % 4
+        if kind == 0:
+            lines.append(f"SETTING_{index:05d} = 'value-{index}'  # inline comment")
+        elif kind == 1:
+            lines.append(f"SETTING_{index:05d} = {index}")
+        elif kind == 2:
+            lines.append(f"SETTING_{index:05d} = ['item-{index}', {index}, True, None]")
+        else:
+            lines.append(
+                f"SETTING_{index:05d} = {{'name': 'setting-{index}', 'enabled': {index % 2 == 0}, 'limit': {index}}}")
+
+    return '\n'.join(lines) + '\n'
+
+
+def run_pipeline(source: str, workDir: str, measure, patch: bool = False) -> None:
+    """
+    Run the settings pipeline of 'EditSettings.edit()' on 'source', one stage at a time.
+
+    The database is left to SQLite and nothing is written outside 'workDir'.
+
+    Args:
+        source (str): The settings.py content.
+        workDir (str): An empty directory to use as the project root.
+        measure: Called as 'measure(stageName, function)' for every stage, returns what the function returns.
+        patch (bool): Splice the changes into the source instead of the commit, unparse and format stages. Default is False.
+    """
+    settingsPath = os.path.join(workDir, 'settings.py')
+    with open(settingsPath, 'w') as f:
+        f.write(source)
+
+    editor = EditSettings('bench', settingsPath, '', {'default': ''}, 'true', 'true', projectRoot=workDir,
+                          logFileName=os.path.join(workDir, 'benchmark.log'), logLevel=logging.WARNING,
+                          patch=patch)
+    editor.provisioning = None
+    editor.cacheProvisioning = None
+    editor.scaffold = Scaffold(workDir)
+
+    try:
+        def parse() -> None:
+            editor.root = editor.parse_file()
+            editor.rewriter = SettingsRewriter(editor.root)
+
+        measure('parse_file', parse)
+        # The transforms of 'EditSettings.edit()', in the same order
+        for stepName, step, _, _, _ in editor.transforms():
+            measure(stepName, step)
+
+        if patch:
+            measure('patch', editor.patch_content)
+            return
+
+        measure('commit', editor.rewriter.commit)
+        content = measure('unparse', editor.unparse_file)
+        content = measure('add_blank_lines',
+                          lambda: editor.add_blank_lines(content))
+        measure('format_file', lambda: editor.format_file(content))
+
+    finally:
+        editor.close()
+
+
+def benchmark_size(baseSource: str, assignments: int, repeat: int, patch: bool = False) -> dict:
+    """
+    Time every stage of the pipeline on a settings.py with 'assignments' extra settings.
+
+    Each repetition formats without the yapf cache, like a first run. A last, separate run
+    traces the allocations to get the peak memory of each stage, its times aren't kept.
+
+    Returns:
+        dict: The input size, the times of each stage and the peak memory.
+    """
+    source = synthetic_settings(baseSource, assignments)
+    timings = {}
+    cacheDir = yapfFormatter.cacheDir
+
+    def timed(stageName: str, function):
+        start = time.perf_counter()
+        result = function()
+        timings.setdefault(stageName, []).append(
+            time.perf_counter() - start)
+        return result
+
+    peaks = {}
+
+    def traced(stageName: str, function):
+        tracemalloc.reset_peak()
+        result = function()
+        peaks[stageName] = tracemalloc.get_traced_memory()[1]
+        return result
+
+    try:
+        for measure in [timed] * repeat + [traced]:
+            with tempfile.TemporaryDirectory() as workDir:
+                yapfFormatter.cacheDir = os.path.join(workDir, 'yapf')
+
+                if measure is traced:
+                    tracemalloc.start()
+                try:
+                    run_pipeline(source, workDir, measure, patch)
+                finally:
+                    if measure is traced:
+                        tracemalloc.stop()
+    finally:
+        yapfFormatter.cacheDir = cacheDir
+
+    stages = {stageName: {'min': min(runs), 'median': statistics.median(runs), 'runs': runs}
+              for stageName, runs in timings.items()}
+
+    return {
+        'assignments': assignments,
+        'lines': source.count('\n'),
+        'bytes': len(source.encode()),
+        'stages': stages,
+        'total': {'min': sum(stage['min'] for stage in stages.values()),
+                  'median': sum(stage['median'] for stage in stages.values())},
+        'peakMemory': {'stages': peaks, 'max': max(peaks.values())},
+    }
+
+
+def run_benchmarks(sizes: list, repeat: int, logger=None, patch: bool = False) -> dict:
+    baseSource = stock_settings()
+    results = []
+
+    for assignments in sizes:
+        result = benchmark_size(baseSource, assignments, repeat, patch)
+        results.append(result)
+
+        if logger is not None:
+            logger.log_info(f"{assignments} assignments ({result['lines']} lines): "
+                            f"{result['total']['median'] * 1000:.1f}ms, "
+                            f"peak {result['peakMemory']['max'] / 2 ** 20:.1f}MiB.")
+
+    return {
+        'machine': {
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'python': sys.version.split()[0],
+        },
+        'repeat': repeat,
+        'patch': patch,
+        'results': results,
+        # Kilobytes on Linux, bytes on macOS
+        'maxRss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+if __name__ == "__main__":
+    from logger import Logger
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the settings.py transformation pipeline on generated inputs.")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated numbers of extra top-level settings, 0 is the stock settings.py. "
+                             f"Default is {','.join(map(str, DEFAULT_SIZES))}.")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Timed runs per size. Default is 3.")
+    parser.add_argument('--patch', action='store_true',
+                        help="Benchmark the patch mode, which splices the changes into the source instead of reformatting it.")
+    parser.add_argument('--output', default=None,
+                        help="Where to write the JSON results. Default is the standard output.")
+    args = parser.parse_args()
+
+    logger = Logger(logFileName=os.path.join(
+        tempfile.gettempdir(), 'django-venv-benchmark.log'))
+    results = run_benchmarks([int(size) for size in args.sizes.split(',')],
+                             args.repeat, logger, args.patch)
+
+    if args.output is None:
+        print(json.dumps(results, indent=2))
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        logger.log_info(f"Results saved in '{args.output}'.")
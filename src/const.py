@@ -9,10 +9,72 @@ def generate_password():
 
 
 YAPF_STYLE = "{SPLIT_ALL_COMMA_SEPARATED_VALUES: 1, SPACES_BEFORE_COMMENT: 2, SPLIT_ALL_COMMA_SEPARATED_VALUES: 1}"
+# The cache of formatted outputs is trimmed to this many bytes, least recently used first
+YAPF_CACHE_MAX_SIZE = 64 * 1024 * 1024
 
 MODULES_TO_IMPORT = ['environ', 'os']
+# settings.py lines ending with one of these are followed by a blank line
+BLANK_LINE_AFTER = (']', '}', ')', "'", 'True')
 DEFAULT_ASSETS_ROOT = '/static/assets'
 
+# Transforms applied to the project, so a re-run only does what's missing
+MANIFEST_FILE_NAME = '.django-venv.json'
+
+# Threads running the independent steps of 'EditSettings.edit()' at the same time
+SCHEDULER_MAX_WORKERS = 4
+
+# Settings packages ('settings/base.py', 'dev.py', ...): the module holding the shared settings
+SETTINGS_BASE_MODULE = 'base'
+
+# Steps of 'EditSettings.transforms()' joining a provisioning, and the step adding its setting. In a package the
+# provisioning is joined once before the modules are edited, each module only runs the second step.
+SETTINGS_JOIN_STEPS = {'_add_cache': '_add_caches_setting', '_add_database': '_add_databases_setting'}
+
+# Steps running on every module of a package, they only change the modules with the settings they comment
+SETTINGS_EVERY_MODULE_STEPS = ['_add_comments']
+
+# Steps replacing a setting, or inserting next to it, run on the first module assigning it, the base module first.
+# The overrides of the other modules, like DEBUG = False in 'prod.py', are left as they are.
+SETTINGS_STEP_ANCHORS = {'_add_base_dir': 'BASE_DIR', '_add_root_dir': 'BASE_DIR', '_add_env': 'SECRET_KEY',
+                         '_add_secret_key': 'SECRET_KEY', '_add_debug': 'DEBUG', '_add_assets_root': 'DEBUG',
+                         '_add_allowed_hosts': 'ALLOWED_HOSTS', '_add_csrf_trusted': 'ALLOWED_HOSTS',
+                         '_add_installed_apps': 'INSTALLED_APPS', '_add_middleware': 'MIDDLEWARE',
+                         '_add_template_dir': 'ROOT_URLCONF', '_add_templates': 'TEMPLATES',
+                         '_add_static_root': 'STATIC_URL', '_add_static_files_dirs': 'STATIC_URL',
+                         '_add_storages': 'STATIC_URL', '_add_asgi_application': 'WSGI_APPLICATION',
+                         '_add_databases_setting': 'DATABASES'}
+
+# Chrome trace written by 'script.py' when tracing is enabled, next to 'script.log'
+TRACE_FILE_NAME = 'script.trace.json'
+
+# Seconds the 'database' script is given to create the container, the user and the database
+DATABASE_SETUP_TIMEOUT = 600
+
+# Readiness probe of the database containers: give up after READINESS_TIMEOUT seconds,
+# the delay between probes doubles from READINESS_INITIAL_DELAY up to READINESS_MAX_DELAY
+READINESS_TIMEOUT = 120
+READINESS_INITIAL_DELAY = 0.25
+READINESS_MAX_DELAY = 5
+
+# Dependencies installed in the project's virtual environment
+BASE_REQUIREMENTS = ['Django', 'django-environ',
+                     'yapf', 'ast-comments', 'colorlog']
+HTMX_REQUIREMENTS = ['django-htmx']
+JINJA2_REQUIREMENTS = ['Jinja2']
+# WhiteNoise serves the static files, the others are used by the 'buildassets' command
+ASSETS_REQUIREMENTS = ['whitenoise', 'Brotli', 'rcssmin', 'rjsmin']
+ASGI_REQUIREMENTS = ['gunicorn', 'uvicorn-worker', 'uvicorn[standard]']
+DATABASE_REQUIREMENTS = {'mysql': ['mysqlclient'], 'postgre': ['psycopg[binary]']}
+POOLING_REQUIREMENTS = {'postgre': ['psycopg-pool']}
+CACHE_REQUIREMENTS = {'redis': ['redis'], 'memcached': ['pymemcache']}
+
+# The wheelhouse cache is trimmed to this many bytes, least recently used sets first
+WHEELHOUSE_MAX_SIZE = 1024 * 1024 * 1024
+# The template virtual environments are trimmed to this many bytes, least recently cloned first
+GOLDEN_VENVS_MAX_SIZE = 4 * 1024 * 1024 * 1024
+# Seconds a resolved requirement set is reused before pip resolves it again, to pick up new releases
+WHEELHOUSE_RESOLVE_MAX_AGE = 24 * 60 * 60
+
 # Default MySQL:
 
 MYSQL_ROOT_PASSWORD = generate_password()
@@ -21,6 +83,35 @@ MYSQL_PORT = 3336
 MYSQL_USER = 'test'
 MYSQL_PASSWORD = generate_password()
 
+# Connection pooling ('--db-pooling'): defaults of the '.env' keys the DATABASES setting reads
+DB_CONN_MAX_AGE = 600
+DB_CONN_HEALTH_CHECKS = True
+POSTGRESQL_POOL_MIN_SIZE = 2
+POSTGRESQL_POOL_MAX_SIZE = 10
+POSTGRESQL_POOL_TIMEOUT = 10
+MYSQL_CONNECT_TIMEOUT = 10
+
+# PgBouncer container in front of the provisioned PostgreSQL ('--pgbouncer'), in transaction pooling mode
+PGBOUNCER_IMAGE = 'edoburu/pgbouncer:latest'
+PGBOUNCER_PORT = 6434
+PGBOUNCER_POOL_MODE = 'transaction'
+PGBOUNCER_DEFAULT_POOL_SIZE = 20
+PGBOUNCER_MAX_CLIENT_CONN = 500
+
+# Cache backends of '--cache', the network ones get a local container like the databases
+CACHE_BACKENDS = ['redis', 'memcached', 'file', 'locmem']
+
+# Default Redis:
+
+REDIS_HOST = '127.0.0.1'
+REDIS_PORT = 6380
+REDIS_PASSWORD = generate_password()
+
+# Default Memcached:
+
+MEMCACHED_HOST = '127.0.0.1'
+MEMCACHED_PORT = 11212
+
 # Default PostgreSQL:
 
 POSTGRESQL_ROOT_PASSWORD = generate_password()
@@ -35,9 +126,23 @@ LITERAL_READ_ENV = "environ.Env.read_env(os.path.join(BASE_DIR, '.env'))"
 LITERAL_ENV = "env = environ.Env(DEBUG=(bool, True))"
 LITERAL_DEBUG = "DEBUG = env('DEBUG')"
 LITERAL_ROOT_DIR = "ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))"
+# In a settings package ('root/settings/base.py') the project root is one directory further up
+LITERAL_BASE_DIR_PACKAGE = "BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))"
+LITERAL_ROOT_DIR_PACKAGE = "ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))"
 LITERAL_SECRET_KEY = "SECRET_KEY = env('SECRET_KEY')"
 LITERAL_MYSQL = "DATABASES = {'default': {'ENGINE': 'django.db.backends.mysql', 'NAME': os.getenv('MYSQL_NAME'), 'USER': os.getenv('MYSQL_USER'), 'PASSWORD': os.getenv('MYSQL_PASSWORD'), 'HOST': os.getenv('MYSQL_HOST', 'localhost'), 'PORT': os.getenv('MYSQL_PORT')} }"
 LITERAL_POSTGRESQL = "DATABASES = {'default': {'ENGINE': 'django.db.backends.postgresql', 'NAME': os.getenv('POSTGRESQL_NAME'), 'USER': os.getenv('POSTGRESQL_USER'), 'PASSWORD': os.getenv('POSTGRESQL_PASSWORD'), 'HOST': os.getenv('POSTGRESQL_HOST', 'localhost'), 'PORT': os.getenv('POSTGRESQL_PORT')} }"
+# With '--db-pooling': persistent connections, checked before reuse, and the driver options, all read from '.env'.
+# Django's psycopg pool and persistent connections exclude each other, CONN_MAX_AGE is 0 while the pool is on.
+LITERAL_MYSQL_POOLED = "DATABASES = {'default': {'ENGINE': 'django.db.backends.mysql', 'NAME': os.getenv('MYSQL_NAME'), 'USER': os.getenv('MYSQL_USER'), 'PASSWORD': os.getenv('MYSQL_PASSWORD'), 'HOST': os.getenv('MYSQL_HOST', 'localhost'), 'PORT': os.getenv('MYSQL_PORT'), 'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=0), 'CONN_HEALTH_CHECKS': env.bool('DB_CONN_HEALTH_CHECKS', default=False), 'OPTIONS': {'charset': 'utf8mb4', 'connect_timeout': env.int('MYSQL_CONNECT_TIMEOUT', default=10), 'isolation_level': 'read committed', 'init_command': \"SET sql_mode='STRICT_TRANS_TABLES'\"}} }"
+LITERAL_POSTGRESQL_POOLED = "DATABASES = {'default': {'ENGINE': 'django.db.backends.postgresql', 'NAME': os.getenv('POSTGRESQL_NAME'), 'USER': os.getenv('POSTGRESQL_USER'), 'PASSWORD': os.getenv('POSTGRESQL_PASSWORD'), 'HOST': os.getenv('POSTGRESQL_HOST', 'localhost'), 'PORT': os.getenv('POSTGRESQL_PORT'), 'CONN_MAX_AGE': 0 if env.bool('POSTGRESQL_POOL', default=False) else env.int('DB_CONN_MAX_AGE', default=0), 'CONN_HEALTH_CHECKS': env.bool('DB_CONN_HEALTH_CHECKS', default=False), 'DISABLE_SERVER_SIDE_CURSORS': env.bool('POSTGRESQL_DISABLE_SERVER_SIDE_CURSORS', default=False), 'OPTIONS': {'pool': {'min_size': env.int('POSTGRESQL_POOL_MIN_SIZE', default=2), 'max_size': env.int('POSTGRESQL_POOL_MAX_SIZE', default=10), 'timeout': env.int('POSTGRESQL_POOL_TIMEOUT', default=10)} if env.bool('POSTGRESQL_POOL', default=False) else False}} }"
+LITERAL_CACHES_REDIS = "CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': os.getenv('REDIS_URL')}}"
+LITERAL_CACHES_MEMCACHED = "CACHES = {'default': {'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache', 'LOCATION': os.getenv('MEMCACHED_LOCATION')}}"
+LITERAL_CACHES_FILE = "CACHES = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': os.path.join(ROOT_DIR, 'cache')}}"
+LITERAL_CACHES_LOCMEM = "CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'}}"
+CACHES_LITERALS = {'redis': LITERAL_CACHES_REDIS, 'memcached': LITERAL_CACHES_MEMCACHED,
+                   'file': LITERAL_CACHES_FILE, 'locmem': LITERAL_CACHES_LOCMEM}
+LITERAL_SESSION_ENGINE = "SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'"
 LITERAL_ASSETS_ROOT = "ASSETS_ROOT = os.getenv('ASSETS_ROOT')"
 LITERAL_ALLOWED_HOSTS = "ALLOWED_HOSTS = ['localhost', '127.0.0.1', env('SERVER', default='127.0.0.1')]"
 LITERAL_CSRF_TRUSTED_ORIGINS = "CSRF_TRUSTED_ORIGINS = ['http://127.0.0.1', 'https://' + env('SERVER', default='127.0.0.1')]"
@@ -47,9 +152,22 @@ LITERAL_INSTALLED_APPS_HTMX = "INSTALLED_APPS = ['django.contrib.admin','django.
 
 LITERAL_MIDDLEWARE = "MIDDLEWARE = ['django.middleware.security.SecurityMiddleware', 'django.contrib.sessions.middleware.SessionMiddleware', 'django.middleware.common.CommonMiddleware', 'django_htmx.middleware.HtmxMiddleware', 'django.middleware.csrf.CsrfViewMiddleware', 'django.contrib.auth.middleware.AuthenticationMiddleware', 'django.contrib.messages.middleware.MessageMiddleware', 'django.middleware.clickjacking.XFrameOptionsMiddleware']"
 LITERAL_TEMPLATE_DIR = "TEMPLATE_DIR = os.path.join(ROOT_DIR, 'apps/templates')"
-LITERAL_TEMPLATES = "TEMPLATES = [{'BACKEND': 'django.template.backends.django.DjangoTemplates', 'DIRS': [TEMPLATE_DIR], 'APP_DIRS': True, 'OPTIONS': {'context_processors': ['django.template.context_processors.debug','django.template.context_processors.request','django.contrib.auth.context_processors.auth','django.contrib.messages.context_processors.messages']}}]"
+LITERAL_TEMPLATE_LOADERS = "TEMPLATE_LOADERS = ['django.template.loaders.filesystem.Loader', 'django.template.loaders.app_directories.Loader']"
+# Compiled templates are kept by the cached loader unless DEBUG is on in '.env', then they are read again on every render.
+DJANGO_TEMPLATES_BACKEND = "{'BACKEND': 'django.template.backends.django.DjangoTemplates', 'DIRS': [TEMPLATE_DIR], 'OPTIONS': {'context_processors': ['django.template.context_processors.debug','django.template.context_processors.request','django.contrib.auth.context_processors.auth','django.contrib.messages.context_processors.messages'], 'loaders': TEMPLATE_LOADERS if DEBUG else [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]}}"
+# With '--jinja2', Jinja2 is tried first, from 'apps/jinja2' and the apps' 'jinja2' directories. The admin keeps using Django's engine.
+JINJA2_TEMPLATES_BACKEND = "{'BACKEND': 'django.template.backends.jinja2.Jinja2', 'DIRS': [os.path.join(ROOT_DIR, 'apps/jinja2')], 'APP_DIRS': True, 'OPTIONS': {'environment': 'apps.home.jinja2.environment', 'auto_reload': DEBUG}}"
+LITERAL_TEMPLATES = f"TEMPLATES = [{DJANGO_TEMPLATES_BACKEND}]"
+LITERAL_TEMPLATES_JINJA2 = f"TEMPLATES = [{JINJA2_TEMPLATES_BACKEND}, {DJANGO_TEMPLATES_BACKEND}]"
 LITERAL_STATIC_ROOT = "STATIC_ROOT = os.path.join(ROOT_DIR, 'staticfiles')"
-LITERAL_STATICFILES_DIRS = "STATICFILES_DIRS = (os.path.join(ROOT_DIR, 'apps/static'))"
+# A list, a string in parentheses fails the staticfiles checks and 'collectstatic'
+LITERAL_STATICFILES_DIRS = "STATICFILES_DIRS = [os.path.join(ROOT_DIR, 'apps/static')]"
+# With '--assets': 'collectstatic' fingerprints the static files, WhiteNoise serves them and their '.gz'/'.br' copies
+LITERAL_STORAGES = "STORAGES = {'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'}, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'}}"
+# With '--asgi', the project's package replaces 'root' like in WSGI_APPLICATION
+LITERAL_ASGI_APPLICATION = "ASGI_APPLICATION = 'root.asgi.application'"
+SECURITY_MIDDLEWARE = 'django.middleware.security.SecurityMiddleware'
+WHITENOISE_MIDDLEWARE = 'whitenoise.middleware.WhiteNoiseMiddleware'
 
 # SMTP literals:
 EMAIL_BACKEND = "EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'"
@@ -72,9 +190,14 @@ SETTINGS_COMMENTS = [("BASE_DIR", "# Build paths inside the project like this: o
                      ("MIDDLEWARE", "# The MIDDLEWARE setting defines the order and behavior of middleware components that process each request and response in your Django application."),
                      ("TEMPLATE_DIR",
                       "# Store the path to your custom templates directory."),
+                     ("TEMPLATE_LOADERS", "# Where templates are looked up, the cached loader wraps them when DEBUG is off."),
                      ("TEMPLATES", "# Configures the template engine for your Django project."),
                      ("STATICFILES_DIRS",
                       "# Extra places for collectstatic to find static files."),
+                     ("ASGI_APPLICATION", "# The ASGI entry point, 'gunicorn' serves it with uvicorn workers as set in 'gunicorn.conf.py'."),
+                     ("STORAGES", "# Static files get their content hash in their name, build them with 'manage.py buildassets'. WhiteNoise serves them with far-future cache headers."),
+                     ("CACHES", "# The cache backend, the sessions are read from it before the database."),
+                     ("SESSION_ENGINE", "# Sessions are cached and written through to the database, so most requests don't query it."),
                      ("EMAIL_BACKEND", "# Email backend setting specifies the backend to use for sending email."),
                      ("EMAIL_HOST", "# The hostname of your email server."),
                      ("EMAIL_USE_TLS",
@@ -0,0 +1,147 @@
+import os
+from typing import Union
+from utils import atomic_write
+
+
+class EnvFile:
+    def __init__(self, path: str = '.env'):
+        """
+        In-memory model of the project's '.env' file.
+
+        Keys are collected with 'set()', de-duplicated and kept in the order they were first
+        added, then written once by 'flush()'. The existing file is loaded first, so a re-run
+        updates the keys in place instead of appending them again.
+
+        Args:
+            path (str): Path to the '.env' file. Default is '.env'.
+        """
+        self.path = path
+
+        # Each block is rendered as an optional '# header' line, its keys and a blank line.
+        # Other comment lines of the loaded file are kept in 'values' as '<line>: None', in place.
+        self.blocks = []
+        self.keys = {}  # key -> the block holding it
+        self.history = []  # keys passed to 'set()', in order
+
+        self.load()
+
+    def _block(self, section: Union[str, None]) -> dict:
+        if section is not None:
+            for block in self.blocks:
+                if block['section'] == section:
+                    return block
+
+        block = {'section': section, 'values': {}}
+        self.blocks.append(block)
+        return block
+
+    def load(self) -> None:
+        """Read the existing '.env' file, if any, into the model."""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r') as f:
+            lines = f.read().splitlines()
+
+        block = None
+        for line in lines:
+            line = line.strip()
+
+            if not line:
+                block = None
+
+            # A '# <section>:' line starting a block is its header, like 'render()' writes them
+            elif line.startswith('#') and line.endswith(':') and block is None:
+                block = self._block(line[1:].strip().rstrip(':'))
+
+            elif line.startswith('#'):
+                if block is None:
+                    block = self._block(None)
+                block['values'][line] = None
+
+            elif '=' in line:
+                if block is None:
+                    block = self._block(None)
+                key, value = line.split('=', 1)
+                self._set_raw(key.strip(), value.strip(), block)
+
+    def _set_raw(self, key: str, value: str, block: Union[dict, None]) -> None:
+        if key in self.keys:
+            self.keys[key]['values'][key] = value
+            return
+
+        if block is None:
+            block = self._block(None)
+
+        block['values'][key] = value
+        self.keys[key] = block
+
+    def set(self, key: str, value, quoted: bool = True, section: str = None) -> None:
+        """
+        Set 'key' in the '.env' file, replacing its previous value if it is already there.
+
+        Args:
+            key (str): The environment variable name.
+            value: The value, written as 'str(value)'.
+            quoted (bool): Wrap the value in single quotes. Default is True.
+            section (str): Group the key under a '# <section>:' header. Keys without a
+                section get a block of their own.
+        """
+        value = f"'{value}'" if quoted else str(value)
+        self.history.append(key)
+        self._set_raw(key, value, None if section is None else self._block(section))
+
+    def setdefault(self, key: str, value, quoted: bool = True, section: str = None) -> None:
+        """
+        Set 'key' like 'set()' unless it is already in the '.env' file, e.g. a DEBUG=False the user
+        wrote: the defaults never replace what's there, only the values the tool owns do.
+        """
+        if key in self.keys:
+            self.history.append(key)
+            return
+
+        self.set(key, value, quoted, section)
+
+    def export(self, keys: list) -> list:
+        """Return '(key, raw value, section)' for each of 'keys', to replay them with 'merge()' in another 'EnvFile'."""
+        return [(key, self.keys[key]['values'][key], self.keys[key]['section'])
+                for key in dict.fromkeys(keys)]
+
+    def merge(self, entries: list) -> None:
+        """Set the keys 'export()' returned, like 'set()' would with the same values."""
+        for key, value, section in entries:
+            self.history.append(key)
+            self._set_raw(key, value, None if section is None else self._block(section))
+
+    def add_section(self, section: str) -> None:
+        """Reserve the place of a '# <section>:' block, so keys set later still end up there."""
+        self._block(section)
+
+    def get(self, key: str) -> Union[str, None]:
+        """Return the value of 'key' without its quotes, or None if it's not set."""
+        if key not in self.keys:
+            return None
+        return self.keys[key]['values'][key].strip("'\"")
+
+    def render(self) -> str:
+        lines = []
+        for block in self.blocks:
+            if not block['values']:
+                continue
+
+            if block['section'] is not None:
+                lines.append(f"# {block['section']}:")
+            for key, value in block['values'].items():
+                lines.append(key if value is None else f"{key}={value}")
+            lines.append('')
+
+        return ''.join(f"{line}\n" for line in lines)
+
+    def flush(self) -> None:
+        """
+        Write the '.env' file at once.
+
+        The content goes to a temporary file in the same directory which then replaces
+        '.env', so readers see either the complete old file or the complete new one.
+        """
+        atomic_write(self.path, self.render())
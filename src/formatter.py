@@ -0,0 +1,119 @@
+import hashlib
+import os
+from yapf import __version__ as yapfVersion
+from yapf.yapflib import style
+from yapf.yapflib.yapf_api import FormatCode
+from const import YAPF_STYLE, YAPF_CACHE_MAX_SIZE
+from utils import get_cache_dir, atomic_write
+
+
+class YapfFormatter:
+    def __init__(self, styleConfig: str = YAPF_STYLE, cacheDir: str = None, maxSize: int = YAPF_CACHE_MAX_SIZE):
+        """
+        Format Python sources with yapf's API instead of spawning the 'yapf' command.
+
+        The style is parsed once and reused for every call. Formatted outputs are kept on
+        disk by content hash, so formatting a source that was already formatted (or that is
+        the output of a previous run) is skipped. The least recently used outputs are evicted
+        when the cache grows over 'maxSize' bytes.
+
+        Args:
+            styleConfig (str): The yapf style, the same string given to 'yapf --style'. Default is 'YAPF_STYLE'.
+            cacheDir (str): Where to store the formatted outputs. Default is '<get_cache_dir()>/yapf'.
+            maxSize (int): Size in bytes the cache is trimmed to. Default is 'YAPF_CACHE_MAX_SIZE'.
+        """
+        self.styleConfig = styleConfig
+        self.style = None
+        self.cacheDir = cacheDir or os.path.join(get_cache_dir(), 'yapf')
+        self.maxSize = maxSize
+
+    def _key(self, source: str) -> str:
+        digest = hashlib.sha256(
+            f"{yapfVersion}\0{self.styleConfig}\0".encode())
+        digest.update(source.encode())
+        return digest.hexdigest()
+
+    def _read_cache(self, key: str):
+        cachePath = os.path.join(self.cacheDir, key)
+        try:
+            with open(cachePath, 'r') as f:
+                content = f.read()
+            # The mtime is the last use, for the LRU eviction.
+            os.utime(cachePath)
+            return content
+        except OSError:
+            return None
+
+    def _write_cache(self, key: str, content: str) -> None:
+        cachePath = os.path.join(self.cacheDir, key)
+        if os.path.exists(cachePath):
+            return
+
+        try:
+            os.makedirs(self.cacheDir, exist_ok=True)
+            atomic_write(cachePath, content)
+        except OSError:
+            pass  # The cache is an optimisation, formatting without it is fine.
+
+    def format(self, source: str) -> str:
+        """
+        Return 'source' formatted with the configured style.
+
+        Args:
+            source (str): The Python source to format.
+        """
+        key = self._key(source)
+        formatted = self._read_cache(key)
+        if formatted is not None:
+            return formatted
+
+        if self.style is None:
+            self.style = style.CreateStyleFromConfig(self.styleConfig)
+
+        # yapf reads its style from a module global, set it back in case someone else changed it.
+        style.SetGlobalStyle(self.style)
+        formatted, _ = FormatCode(source, style_config=None)
+
+        # Formatting is idempotent, so the output maps to itself too.
+        self._write_cache(key, formatted)
+        self._write_cache(self._key(formatted), formatted)
+        self.evict()
+
+        return formatted
+
+    def evict(self) -> list:
+        """
+        Remove the least recently used outputs until the cache fits in 'maxSize'.
+
+        Returns:
+            list: The removed files.
+        """
+        entries = []
+        totalSize = 0
+
+        try:
+            for entry in os.scandir(self.cacheDir):
+                if entry.name.endswith('.tmp'):
+                    continue  # Being written by another run
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                totalSize += stat.st_size
+        except OSError:
+            return []
+
+        removed = []
+        for _, size, cachePath in sorted(entries):
+            if totalSize <= self.maxSize:
+                break
+
+            try:
+                os.remove(cachePath)
+            except OSError:
+                pass  # Already removed by another run
+            totalSize -= size
+            removed.append(cachePath)
+
+        return removed
+
+
+yapfFormatter = YapfFormatter()
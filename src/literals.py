@@ -0,0 +1,100 @@
+import ast_comments
+import hashlib
+import os
+import pickle
+import sys
+import const
+from importlib.metadata import version, PackageNotFoundError
+from utils import get_cache_dir, atomic_write
+
+
+class LiteralCache:
+    def __init__(self, cacheDir: str = None):
+        """
+        Cache of the parsed 'LITERAL_*', 'EMAIL_*' and 'SETTINGS_COMMENTS' templates from const.py.
+
+        The templates are parsed once per const.py content and saved on disk as pickled
+        nodes. Every 'node()' call unpickles a fresh copy, which is a lot cheaper than
+        'ast_comments.parse()' and lets the caller freely mutate the returned node.
+
+        Args:
+            cacheDir (str): Where to store the cache file. Default is 'get_cache_dir()'.
+        """
+        self.cacheDir = cacheDir or get_cache_dir()
+        self.blobs = None
+
+    @staticmethod
+    def _const_hash() -> str:
+        try:
+            astCommentsVersion = version('ast-comments')
+        except PackageNotFoundError:
+            astCommentsVersion = 'unknown'
+
+        digest = hashlib.sha256()
+        with open(const.__file__, 'rb') as f:
+            digest.update(f.read())
+        digest.update(f"{sys.version_info[:2]}{astCommentsVersion}".encode())
+        return digest.hexdigest()[:16]
+
+    @staticmethod
+    def _templates() -> list:
+        """Return every source string from const.py that gets parsed into a settings node."""
+        templates = [value for name, value in vars(const).items()
+                     if name.startswith(('LITERAL_', 'EMAIL_')) and isinstance(value, str)]
+        return templates
+
+    def _load(self) -> dict:
+        cachePath = os.path.join(
+            self.cacheDir, f"literals-{self._const_hash()}.pickle")
+
+        try:
+            with open(cachePath, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            pass
+
+        blobs = {}
+        for source in self._templates():
+            blobs[source] = pickle.dumps(ast_comments.parse(source).body[0])
+        for _, commentText in const.SETTINGS_COMMENTS:
+            blobs[commentText] = pickle.dumps(
+                ast_comments.Comment(value=commentText, inline=False))
+
+        # Write to a temporary file first, so a concurrent run never reads half a cache.
+        try:
+            os.makedirs(self.cacheDir, exist_ok=True)
+            atomic_write(cachePath, pickle.dumps(blobs), 'wb')
+        except OSError:
+            pass  # The cache is an optimisation, running without it is fine.
+
+        return blobs
+
+    def node(self, source: str) -> ast_comments.AST:
+        """
+        Return a fresh copy of the first statement of 'source'.
+
+        Args:
+            source (str): One of the settings templates from const.py.
+        """
+        if self.blobs is None:
+            self.blobs = self._load()
+
+        if source not in self.blobs:
+            self.blobs[source] = pickle.dumps(
+                ast_comments.parse(source).body[0])
+
+        return pickle.loads(self.blobs[source])
+
+    def comment(self, commentText: str) -> ast_comments.Comment:
+        """Return a fresh comment node for 'commentText'."""
+        if self.blobs is None:
+            self.blobs = self._load()
+
+        if commentText not in self.blobs:
+            self.blobs[commentText] = pickle.dumps(
+                ast_comments.Comment(value=commentText, inline=False))
+
+        return pickle.loads(self.blobs[commentText])
+
+
+literalCache = LiteralCache()
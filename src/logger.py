@@ -1,16 +1,226 @@
-from script import Logger
+import atexit
+import logging
+import os
+import queue
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+import colorlog
+
+# Kept to the standard library and colorlog: the shell scripts start this module to log,
+# and it must not pull in the settings editor, Django or 'const'.
+
+
+class _LogFileHandler(logging.Handler):
+    def __init__(self):
+        """Write each record to the log file of the Logger that emitted it."""
+        super().__init__()
+        self.files = {}  # absolute path -> FileHandler
+
+    def _file(self, path: str) -> logging.FileHandler:
+        handler = self.files.get(path)
+        if handler is None:
+            handler = logging.FileHandler(path)
+            handler.setFormatter(logging.Formatter(
+                "%(asctime)s [%(levelname)s]: %(message)s"))
+            self.files[path] = handler
+        return handler
+
+    def open_file(self, path: str) -> None:
+        with self.lock:
+            self._file(path)
+
+    def close_file(self, path: str) -> None:
+        with self.lock:
+            handler = self.files.pop(path, None)
+            if handler is not None:
+                handler.close()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        path = getattr(record, 'logFile', None)
+        if path is not None:
+            self._file(path).handle(record)
+
+    def close(self) -> None:
+        with self.lock:
+            for handler in self.files.values():
+                handler.close()
+            self.files = {}
+        super().close()
+
+
+class LogQueue:
+    def __init__(self):
+        """
+        The queue every Logger of the process writes to, and the thread that writes its records
+        to the console and to the log files.
+
+        Logging a message only puts it on the queue, the formatting and the writes happen on
+        the listener thread. It's started by the first Logger, again in a forked child since the
+        parent's thread doesn't exist there, and the records still queued are written on exit.
+        """
+        self.lock = threading.Lock()
+        self.pid = None
+        self.queue = None
+        self.handler = None
+        self.files = None
+        self.listener = None
+
+    def attach(self, logger: logging.Logger) -> None:
+        """Make 'logger' write to the queue, once however many Logger instances use it."""
+        with self.lock:
+            if self.pid != os.getpid():
+                self.queue = queue.Queue()
+                self.handler = QueueHandler(self.queue)
+                self.files = _LogFileHandler()
+
+                formatter = colorlog.ColoredFormatter(
+                    "%(log_color)s%(asctime)s [%(levelname)s]: %(message)s",
+                    log_colors={
+                        'INFO': 'green',
+                        'WARNING': 'yellow',
+                        'ERROR': 'red',
+                    },
+                    secondary_log_colors={},
+                    style='%'
+                )
+
+                consoleHandler = colorlog.StreamHandler()
+                consoleHandler.setFormatter(formatter)
+
+                self.listener = QueueListener(
+                    self.queue, consoleHandler, self.files)
+                self.listener.start()
+                self.pid = os.getpid()
+                atexit.register(self.stop)
+
+            # A forked child inherits its parent's queue handler, replace it with this process' one.
+            for handler in list(logger.handlers):
+                if isinstance(handler, QueueHandler) and handler is not self.handler:
+                    logger.removeHandler(handler)
+            if self.handler not in logger.handlers:
+                logger.addHandler(self.handler)
+
+    def flush(self) -> None:
+        """Wait until every queued record is written."""
+        if self.pid == os.getpid():
+            self.queue.join()
+
+    def stop(self) -> None:
+        with self.lock:
+            if self.pid != os.getpid():
+                return
+
+            self.listener.stop()
+            self.files.close()
+            self.pid = None
+
+
+logQueue = LogQueue()
+
+
+class Logger:
+    def __init__(self, logFileName='script.log', logLevel=logging.INFO):
+        """
+        Initialize the ColoredLogger.
+
+        Every instance shares the same 'LogQueue', so creating several of them doesn't
+        duplicate the messages. Each one writes to its own 'logFileName'.
+
+        Args:
+            log_file_name (str): The name of the log file. Default is "script.log".
+            log_level (int): The logging level. Default is INFO.
+        """
+        self.logger = logging.getLogger(__name__)
+        # The logging.Logger is shared, each instance filters its own messages with 'logLevel'.
+        self.logger.setLevel(logging.DEBUG)
+        self.logLevel = logLevel
+
+        logQueue.attach(self.logger)
+
+        self.logFile = os.path.abspath(logFileName)
+        logQueue.files.open_file(self.logFile)
+        self.extra = {'logFile': self.logFile}
+
+    def close(self):
+        """Write the queued messages and close this instance's log file."""
+        logQueue.flush()
+        logQueue.files.close_file(self.logFile)
+
+    def log_info(self, message):
+        """
+        Log an informational message.
+
+        Args:
+            message (str): The message to log.
+        """
+        if self.logLevel <= logging.INFO:
+            self.logger.info(message, extra=self.extra)
+
+    def log_warning(self, message):
+        """
+        Log a warning message.
+
+        Args:
+            message (str): The warning message to log.
+        """
+        if self.logLevel <= logging.WARNING:
+            self.logger.warning(message, extra=self.extra)
+
+    def log_error(self, message):
+        """
+        Log an error message.
+
+        Args:
+            message (str): The error message to log.
+        """
+        if self.logLevel <= logging.ERROR:
+            self.logger.error(message, extra=self.extra)
+
+
+LEVELS = {
+    'info': Logger.log_info,
+    'warning': Logger.log_warning,
+    'error': Logger.log_error,
+}
+
+
+def log_stream(logger: Logger, stream, ack=None) -> int:
+    """
+    Log every 'level<TAB>message' line of 'stream', for the shell scripts to keep a single logger process.
+
+    Args:
+        logger (Logger): Logger instance
+        stream: Where to read the lines from, like 'sys.stdin'.
+        ack: If given, an empty line is written there once each message is written to the console
+            and the log file, so the caller can wait for it and keep its own output in order.
+
+    Returns:
+        int: The number of messages logged.
+    """
+    count = 0
+
+    for line in stream:
+        level, _, message = line.rstrip('\n').partition('\t')
+        LEVELS.get(level, Logger.log_info)(logger, message)
+        count += 1
+
+        if ack is not None:
+            logQueue.flush()
+            ack.write('\n')
+            ack.flush()
+
+    return count
+
 
 if __name__ == '__main__':
-    level = sys.argv[1]
-    message = sys.argv[2]
+    # logger.py <level> <message>
+    # logger.py --stdin [--ack]: one 'level<TAB>message' per line, until the end of the input
     logger = Logger()
 
-    if level == 'info':
-        logger.log_info(message)
-
-    elif level == 'warning':
-        logger.log_warning(message)
+    if sys.argv[1] == '--stdin':
+        log_stream(logger, sys.stdin,
+                   sys.stdout if '--ack' in sys.argv[2:] else None)
 
-    elif level == 'error':
-        logger.log_error(message)
+    elif sys.argv[1] in LEVELS:
+        LEVELS[sys.argv[1]](logger, sys.argv[2])
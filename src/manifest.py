@@ -0,0 +1,111 @@
+import ast_comments
+import hashlib
+import json
+import os
+from typing import Union
+from literals import LiteralCache
+from utils import atomic_write
+
+
+def node_hash(node: ast_comments.AST) -> str:
+    return hashlib.sha256(ast_comments.unparse(node).encode()).hexdigest()[:16]
+
+
+def file_hash(path: str) -> Union[str, None]:
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class TransformManifest:
+    def __init__(self, path: str):
+        """
+        Record of the transforms applied to a project, so a re-run only does what's missing.
+
+        For every step it keeps a hash of its inputs (const.py and the options the step depends
+        on) and what it produced: the hashes of the settings.py statements it added, the '.env'
+        keys it set and the files it created. A step is applied when its inputs are the same and
+        all of that is still in the project. The hashes of the edited files after the run let an
+        unchanged project skip even the parsing.
+
+        Args:
+            path (str): Path to the manifest, a JSON file in the project root.
+        """
+        self.path = path
+        self.steps = {}
+        self.files = {}
+        self.constHash = LiteralCache._const_hash()
+
+        try:
+            with open(self.path, 'r') as f:
+                manifest = json.load(f)
+            self.steps, self.files = manifest['steps'], manifest['files']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def inputs_hash(self, stepName: str, options: dict) -> str:
+        inputs = json.dumps([self.constHash, stepName, options],
+                            sort_keys=True, default=str)
+        return hashlib.sha256(inputs.encode()).hexdigest()[:16]
+
+    def _file_key(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), os.path.dirname(os.path.abspath(self.path)))
+
+    def _paths_exist(self, entry: dict, projectRoot: str) -> bool:
+        return all(os.path.exists(os.path.join(projectRoot, path)) for path in entry['paths'])
+
+    def is_up_to_date(self, inputs: dict, files: list, projectRoot: str) -> bool:
+        """
+        Whether every step is applied and the files are as the last run left them, without parsing anything.
+
+        Args:
+            inputs (dict): Step name -> 'inputs_hash()' of this run.
+            files (list): Paths of the files the run writes, like settings.py and '.env'.
+            projectRoot (str): Directory the recorded paths are relative to.
+        """
+        if set(inputs) != set(self.steps):
+            return False
+
+        return (all(self.steps[stepName]['inputs'] == inputsHash for stepName, inputsHash in inputs.items())
+                and all(self.files.get(self._file_key(path)) == file_hash(path) for path in files)
+                and all(self._paths_exist(entry, projectRoot) for entry in self.steps.values()))
+
+    def is_applied(self, stepName: str, inputsHash: str, statementHashes: set, env, projectRoot: str) -> bool:
+        """
+        Whether 'stepName' doesn't need to run again.
+
+        Steps that produced nothing the manifest can check, like '_add_comments', never count as applied.
+
+        Args:
+            stepName (str): The step.
+            inputsHash (str): Its 'inputs_hash()' for this run.
+            statementHashes (set): 'node_hash()' of every top-level statement of settings.py.
+            env (EnvFile): The loaded '.env' file.
+            projectRoot (str): Directory the recorded paths are relative to.
+        """
+        entry = self.steps.get(stepName)
+        if entry is None or entry['inputs'] != inputsHash:
+            return False
+        if not (entry['settings'] or entry['env'] or entry['paths']):
+            return False
+
+        return (all(statementHash in statementHashes for statementHash in entry['settings'])
+                and all(env.get(key) is not None for key in entry['env'])
+                and self._paths_exist(entry, projectRoot))
+
+    def record(self, stepName: str, inputsHash: str, nodes: list = (), envKeys: list = (), paths: list = ()) -> None:
+        """Record what 'stepName' produced, replacing what a previous run recorded for it."""
+        self.steps[stepName] = {
+            'inputs': inputsHash,
+            'settings': [node_hash(node) for node in nodes],
+            'env': sorted(set(envKeys)),
+            'paths': sorted(set(paths)),
+        }
+
+    def save(self, files: list) -> None:
+        """Write the manifest, with the hashes of 'files' as they are now."""
+        self.files = {self._file_key(path): file_hash(path) for path in files}
+        atomic_write(self.path, json.dumps(
+            {'steps': self.steps, 'files': self.files}, indent=2))
@@ -0,0 +1,307 @@
+import os
+import signal
+import subprocess
+import threading
+import fcntl
+import json
+from concurrent.futures import CancelledError
+from typing import Union
+from const import *
+from utils import get_cache_dir, atomic_write
+from tracing import tracer
+
+
+def default_credentials(dbType: str, pooler: str = None) -> dict:
+    """
+    Return the credentials of a new database or cache container, from the defaults in const.py.
+
+    With 'pooler' ('pgbouncer'), 'poolerPort' is where the pooler container listens.
+    """
+    if dbType == "mysql":
+        return {'host': MYSQL_HOST, 'port': MYSQL_PORT, 'user': MYSQL_USER,
+                'password': MYSQL_PASSWORD, 'rootPassword': MYSQL_ROOT_PASSWORD}
+
+    elif dbType == "redis":
+        return {'host': REDIS_HOST, 'port': REDIS_PORT, 'password': REDIS_PASSWORD}
+
+    elif dbType == "memcached":
+        return {'host': MEMCACHED_HOST, 'port': MEMCACHED_PORT}
+
+    elif dbType == "postgre":
+        credentials = {'host': POSTGRESQL_HOST, 'port': POSTGRESQL_PORT, 'user': POSTGRESQL_USER,
+                       'password': POSTGRESQL_PASSWORD, 'rootPassword': POSTGRESQL_ROOT_PASSWORD}
+        if pooler == 'pgbouncer':
+            credentials['poolerPort'] = PGBOUNCER_PORT
+        return credentials
+
+    raise ValueError(f"Unsupported database type: '{dbType}'")
+
+
+def database_script_env(dbType: str, projectName: str, credentials: dict) -> dict:
+    """
+    Return the environment variables the 'database' helper script expects.
+
+    Args:
+        dbType (str): 'mysql', 'postgre', 'redis' or 'memcached'.
+        projectName (str): Project name, used for the container and the database.
+        credentials (dict): As returned by 'default_credentials()'.
+    """
+    prefix = {'mysql': 'MYSQL', 'postgre': 'POSTGRESQL',
+              'redis': 'REDIS', 'memcached': 'MEMCACHED'}[dbType]
+
+    scriptEnv = {
+        'CONTAINER_NAME': container_name(projectName, dbType),
+        'DATABASE_TYPE': dbType,
+    }
+    for key, name in [('host', 'HOST'), ('port', 'PORT'), ('user', 'USER'),
+                      ('password', 'PASSWORD'), ('rootPassword', 'ROOT_PASSWORD')]:
+        if key in credentials:
+            scriptEnv[f'{prefix}_{name}'] = f"{credentials[key]}"
+
+    if 'poolerPort' in credentials:
+        scriptEnv.update({
+            'POOLER': 'pgbouncer',
+            'PGBOUNCER_IMAGE': PGBOUNCER_IMAGE,
+            'PGBOUNCER_PORT': f"{credentials['poolerPort']}",
+            'PGBOUNCER_POOL_MODE': PGBOUNCER_POOL_MODE,
+            'PGBOUNCER_DEFAULT_POOL_SIZE': f"{PGBOUNCER_DEFAULT_POOL_SIZE}",
+            'PGBOUNCER_MAX_CLIENT_CONN': f"{PGBOUNCER_MAX_CLIENT_CONN}",
+        })
+
+    return scriptEnv
+
+
+def container_name(projectName: str, dbType: str) -> str:
+    """The database container is named after the project, the cache containers get the backend as a suffix."""
+    if dbType in ('redis', 'memcached'):
+        return f"{projectName}-{dbType}"
+    return projectName
+
+
+def pooler_container_name(projectName: str) -> str:
+    return f"{projectName}-pgbouncer"
+
+
+def container_state(containerName: str) -> Union[str, None]:
+    """
+    Return the docker state of 'containerName' ('running', 'exited', ...), or None if it doesn't exist.
+    """
+    try:
+        result = subprocess.run(['docker', 'inspect', '-f', '{{.State.Status}}', containerName],
+                                capture_output=True, text=True)
+    except OSError:
+        return None
+
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+class ProvisioningState:
+    def __init__(self, path: str = None):
+        """
+        Credentials of the database containers created so far, keyed by project name and database type.
+
+        The state is a JSON file readable only by the user, since it holds passwords. Updates are
+        serialised with a lock file, so concurrent runs don't lose each other's entries.
+
+        Args:
+            path (str): Path to the state file. Default is '<get_cache_dir()>/provisioning.json'.
+        """
+        self.path = path or os.path.join(get_cache_dir(), 'provisioning.json')
+
+    @staticmethod
+    def _key(projectName: str, dbType: str) -> str:
+        return f"{projectName}:{dbType}"
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, projectName: str, dbType: str) -> Union[dict, None]:
+        return self._read().get(self._key(projectName, dbType))
+
+    def _update(self, update) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        with open(f"{self.path}.lock", 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            state = self._read()
+            update(state)
+
+            atomic_write(self.path, json.dumps(
+                state, indent=2), permissions=0o600)
+
+    def save(self, projectName: str, dbType: str, credentials: dict) -> None:
+        self._update(lambda state: state.__setitem__(
+            self._key(projectName, dbType), credentials))
+
+    def remove(self, projectName: str, dbType: str) -> None:
+        self._update(lambda state: state.pop(
+            self._key(projectName, dbType), None))
+
+
+class DatabaseProvisioning:
+    def __init__(self, dbType: str, projectName: str, timeout: float = DATABASE_SETUP_TIMEOUT, state: ProvisioningState = None,
+                 pooler: str = None):
+        """
+        Run the 'database' helper script (container, user and database creation) in a background thread.
+
+        The cache backends ('redis', 'memcached') are provisioned the same way, in a container of their own.
+
+        If a container was already created for this project and database type, and it still exists,
+        it's reused with its stored credentials (and started if it was stopped) instead of being
+        created again. 'credentials' holds what the project should use, and 'reused' tells which case it was.
+
+        With 'pooler' set to 'pgbouncer', a PgBouncer container is put in front of the PostgreSQL
+        one, and 'credentials['poolerPort']' is where it listens. A reused database gets its
+        pooler container created or started too.
+
+        'wait()' joins it and raises whatever made it fail: 'subprocess.CalledProcessError' if the
+        script failed, 'subprocess.TimeoutExpired' if it took longer than 'timeout' and
+        'concurrent.futures.CancelledError' if 'cancel()' was called.
+
+        Args:
+            dbType (str): 'mysql', 'postgre', 'redis' or 'memcached'.
+            projectName (str): Project name
+            timeout (float): Seconds the script is given before being killed. Default is 'DATABASE_SETUP_TIMEOUT'.
+            state (ProvisioningState): Where the credentials of the created containers are kept. Default is 'ProvisioningState()'.
+            pooler (str): 'pgbouncer' for a PgBouncer container in front of PostgreSQL. Default is None.
+        """
+        self.dbType = dbType
+        self.projectName = projectName
+        self.timeout = timeout
+        self.command = [os.path.join(os.path.dirname(__file__), 'database')]
+        self.state = state or ProvisioningState()
+        self.credentials = None
+        self.reused = False
+        self.pooler = pooler
+
+        self.process = None
+        self.error = None
+        self.thread = None
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+
+    def start(self) -> 'DatabaseProvisioning':
+        self.thread = threading.Thread(
+            target=self._run, name=f"provision-{self.projectName}", daemon=True)
+        self.thread.start()
+        return self
+
+    def _reuse_container(self) -> bool:
+        storedCredentials = self.state.get(self.projectName, self.dbType)
+        if storedCredentials is None:
+            return False
+
+        containerState = container_state(
+            container_name(self.projectName, self.dbType))
+        if containerState is None:
+            # The container was removed, its credentials are useless now.
+            self.state.remove(self.projectName, self.dbType)
+            return False
+
+        if containerState != 'running':
+            subprocess.run(['docker', 'start', container_name(self.projectName, self.dbType)],
+                           check=True, capture_output=True, timeout=self.timeout)
+
+        self.credentials = storedCredentials
+        self.reused = True
+        return True
+
+    def _reuse_pooler(self) -> bool:
+        """Start the pooler container of a reused database. Returns False if it has to be created."""
+        containerState = container_state(pooler_container_name(self.projectName))
+        if containerState is None or 'poolerPort' not in self.credentials:
+            return False
+
+        if containerState != 'running':
+            subprocess.run(['docker', 'start', pooler_container_name(self.projectName)],
+                           check=True, capture_output=True, timeout=self.timeout)
+        return True
+
+    def _run(self) -> None:
+        with tracer.span('provisioning', 'database', dbType=self.dbType):
+            self._provision()
+
+    def _provision(self) -> None:
+        try:
+            if self._reuse_container():
+                if self.pooler is None or self._reuse_pooler():
+                    return
+
+                # Only create the pooler, in front of the existing database.
+                self.credentials = {**self.credentials,
+                                    'poolerPort': PGBOUNCER_PORT}
+                self._run_script({**database_script_env(self.dbType, self.projectName, self.credentials),
+                                  'DATABASE_TYPE': self.pooler})
+
+            else:
+                self.credentials = default_credentials(
+                    self.dbType, self.pooler)
+                self._run_script(database_script_env(
+                    self.dbType, self.projectName, self.credentials))
+
+            self.state.save(self.projectName, self.dbType, self.credentials)
+
+        except BaseException as e:
+            self.error = e
+
+    def _run_script(self, scriptEnv: dict) -> None:
+        """Run the 'database' script with the environment variables 'scriptEnv', unless cancelled first."""
+        with self.lock:
+            if self.cancelled.is_set():
+                raise CancelledError()
+
+            # A new session, so the script and the docker commands it runs can be killed together.
+            self.process = subprocess.Popen(self.command, start_new_session=True,
+                                            env=scriptEnv)
+
+        try:
+            returnCode = self.process.wait(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            self._kill()
+            raise
+
+        if self.cancelled.is_set():
+            raise CancelledError()
+        if returnCode != 0:
+            raise subprocess.CalledProcessError(returnCode, self.command)
+
+    def _kill(self) -> None:
+        if self.process is not None and self.process.poll() is None:
+            try:
+                os.killpg(self.process.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+            self.process.wait()
+
+    def wait(self, timeout: float = None) -> None:
+        """
+        Wait for the provisioning to finish.
+
+        Args:
+            timeout (float): Seconds to wait. Default is to wait until the script's own timeout.
+
+        Raises:
+            subprocess.TimeoutExpired: If it didn't finish in 'timeout' seconds. It keeps running.
+        """
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            raise subprocess.TimeoutExpired(self.command, timeout)
+
+        if self.error is not None:
+            raise self.error
+
+    def cancel(self) -> None:
+        """Stop the provisioning if it's still running. Does nothing once it finished."""
+        if self.thread is None or not self.thread.is_alive():
+            return
+
+        with self.lock:
+            self.cancelled.set()
+            self._kill()
+        self.thread.join()
@@ -0,0 +1,154 @@
+import random
+import socket
+import struct
+import sys
+import time
+from const import READINESS_TIMEOUT, READINESS_INITIAL_DELAY, READINESS_MAX_DELAY
+from tracing import tracer
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed by the server.")
+        data += chunk
+    return data
+
+
+def probe_mysql(sock: socket.socket) -> bool:
+    """
+    Check the greeting MySQL sends as soon as a client connects.
+
+    The first packet is the initial handshake, whose payload starts with the protocol version (10).
+    An error packet (0xff), e.g. 'Too many connections', means the server isn't usable yet.
+    """
+    header = _recv_exactly(sock, 4)
+    payloadLength = int.from_bytes(header[:3], 'little')
+    if payloadLength == 0:
+        return False
+
+    protocolVersion = _recv_exactly(sock, 1)[0]
+    return protocolVersion in (9, 10)
+
+
+def probe_postgre(sock: socket.socket, user: str = 'postgres') -> bool:
+    """
+    Send a PostgreSQL startup message and check the server's answer.
+
+    An authentication request ('R') means the server accepts connections. An error ('E') with
+    SQLSTATE 57P03 ('the database system is starting up') means it doesn't yet; any other error,
+    like a wrong user, still comes from a server that's up.
+    """
+    parameters = f"user\0{user}\0database\0postgres\0\0".encode()
+    sock.sendall(struct.pack('!ii', 8 + len(parameters), 196608) + parameters)
+
+    messageType = _recv_exactly(sock, 1)
+    if messageType == b'R':
+        return True
+
+    if messageType == b'E':
+        length = struct.unpack('!i', _recv_exactly(sock, 4))[0]
+        fields = _recv_exactly(sock, length - 4).split(b'\0')
+        return b'C57P03' not in fields
+
+    return False
+
+
+def probe_redis(sock: socket.socket) -> bool:
+    """
+    Send an inline PING. '+PONG' or an authentication error ('-NOAUTH') both come from a server that's up,
+    '-LOADING' means it's still loading its dataset.
+    """
+    sock.sendall(b"PING\r\n")
+    reply = sock.recv(64)
+    return reply.startswith(b'+PONG') or reply.startswith(b'-NOAUTH')
+
+
+def probe_memcached(sock: socket.socket) -> bool:
+    """Ask for the server version, a ready server answers 'VERSION <version>'."""
+    sock.sendall(b"version\r\n")
+    return sock.recv(64).startswith(b'VERSION')
+
+
+PROBES = {
+    'mysql': probe_mysql,
+    'postgre': probe_postgre,
+    'redis': probe_redis,
+    'memcached': probe_memcached,
+}
+
+
+def probe(dbType: str, host: str, port: int, connectTimeout: float = 2.0) -> bool:
+    """
+    Open a TCP connection to 'host:port' and check the database answers like a ready server.
+
+    Returns:
+        bool: True if the server is ready to accept connections.
+    """
+    try:
+        with socket.create_connection((host, int(port)), timeout=connectTimeout) as sock:
+            sock.settimeout(connectTimeout)
+            return PROBES[dbType](sock)
+    except (OSError, ConnectionError):
+        # Refused, reset, timed out or closed by the docker proxy while the container starts.
+        return False
+
+
+def wait_until_ready(dbType: str, host: str, port: int, logger=None, timeout: float = READINESS_TIMEOUT,
+                     initialDelay: float = READINESS_INITIAL_DELAY, maxDelay: float = READINESS_MAX_DELAY) -> float:
+    """
+    Probe the database until it's ready, retrying with exponential backoff and jitter.
+
+    Args:
+        dbType (str): 'mysql', 'postgre', 'redis' or 'memcached'.
+        host (str): Database host.
+        port (int): Database port.
+        logger (Logger): Logger instance, to log the time to ready. Optional.
+        timeout (float): Seconds to wait before giving up. Default is 'READINESS_TIMEOUT'.
+        initialDelay (float): Seconds to wait after the first failed probe. Default is 'READINESS_INITIAL_DELAY'.
+        maxDelay (float): Upper bound of the delay between probes. Default is 'READINESS_MAX_DELAY'.
+
+    Returns:
+        float: Seconds it took for the database to be ready.
+
+    Raises:
+        TimeoutError: If the database isn't ready after 'timeout' seconds.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    attempt = 0
+
+    with tracer.span('wait_until_ready', 'database', dbType=dbType):
+        while True:
+            attempt += 1
+            if probe(dbType, host, port):
+                timeToReady = time.monotonic() - start
+                if logger is not None:
+                    logger.log_info(
+                        f"Database at {host}:{port} ready after {timeToReady:.2f}s ({attempt} probes).")
+                return timeToReady
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(
+                    f"Database at {host}:{port} not ready after {timeout}s ({attempt} probes).")
+
+            # Full delay doubles every attempt, the jitter keeps concurrent runs from probing in lockstep.
+            delay = min(maxDelay, initialDelay * 2 ** (attempt - 1))
+            time.sleep(min(remaining, random.uniform(delay / 2, delay)))
+
+
+if __name__ == "__main__":
+    # Used by the 'database' script: readiness.py <mysql|postgre|redis|memcached> <host> <port>
+    from logger import Logger
+
+    dbType, host, port = sys.argv[1], sys.argv[2], int(sys.argv[3])
+    logger = Logger()
+
+    try:
+        wait_until_ready(dbType, host, port, logger)
+    except TimeoutError as e:
+        logger.log_error(str(e))
+        sys.exit(1)
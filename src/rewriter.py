@@ -0,0 +1,317 @@
+import copy
+import ast_comments
+from typing import Callable, Union
+from literals import literalCache
+
+
+class SettingsRewriter:
+    def __init__(self, root: ast_comments.Module):
+        """
+        Collect the edits made to the top-level settings and apply them in a single pass.
+
+        The rewriter indexes every top-level assignment by its target name once, then
+        the '_add_*' steps register replace/insert rules against that index instead of
+        walking and mutating 'root.body' themselves. 'commit()' builds the new body.
+
+        Args:
+            root (ast_comments.Module): The parsed settings.py module.
+        """
+        self.root = root
+
+        # Setting name -> positions of its top-level assignments in 'root.body'.
+        self.index = {}
+        for position, node in enumerate(root.body):
+            settingName = self.setting_name(node)
+            if settingName is not None:
+                self.index.setdefault(settingName, []).append(position)
+
+        # Setting name -> {'replace': node, 'before': [nodes], 'after': [nodes]}
+        self.rules = {}
+        self.dropFilters = []
+        self.imports = None
+        self.appended = []
+        self.comments = {}
+
+        # Every node registered by a rule, in order, to know what each step added.
+        self.registered = []
+        self.statements = None
+
+    @staticmethod
+    def setting_name(node: ast_comments.AST) -> Union[str, None]:
+        if isinstance(node, ast_comments.Assign) and isinstance(node.targets[0], ast_comments.Name):
+            return node.targets[0].id
+        return None
+
+    def has(self, settingName: str) -> bool:
+        return settingName in self.index
+
+    def find(self, settingName: str) -> Union[ast_comments.Assign, None]:
+        """Return the last top-level assignment of 'settingName', the one Django ends up using."""
+        if settingName not in self.index:
+            return None
+        return self.root.body[self.index[settingName][-1]]
+
+    def _rule(self, settingName: str) -> dict:
+        return self.rules.setdefault(settingName, {'replace': None, 'before': [], 'after': []})
+
+    def _has_statement(self, node: ast_comments.AST) -> bool:
+        if self.statements is None:
+            self.statements = {ast_comments.unparse(statement) for statement in self.root.body
+                               if self.setting_name(statement) is None}
+        return ast_comments.unparse(node) in self.statements
+
+    def _new_nodes(self, nodes: list) -> list:
+        """
+        Return the nodes of 'nodes' that aren't in the file yet.
+
+        A setting that is already assigned gets replaced in place instead, and a statement
+        that is already there as is, like 'environ.Env.read_env(...)', is skipped. That way,
+        running the same rules on an edited file doesn't add anything twice.
+        """
+        newNodes = []
+        for node in nodes:
+            settingName = self.setting_name(node)
+            if settingName in self.index:
+                self._rule(settingName)['replace'] = node
+            elif settingName is not None or not self._has_statement(node):
+                newNodes.append(node)
+
+        self.registered.extend(nodes)
+        return newNodes
+
+    @property
+    def changed(self) -> bool:
+        """Whether any rule changes the file."""
+        return bool(self.rules or self.imports or self.appended)
+
+    def replace(self, settingName: str, node: ast_comments.AST) -> bool:
+        """
+        Replace every top-level assignment of 'settingName' with 'node'.
+
+        Returns:
+            bool: False if the setting is not in the file.
+        """
+        if settingName not in self.index:
+            return False
+        self._rule(settingName)['replace'] = node
+        self.registered.append(node)
+        return True
+
+    def insert_before(self, settingName: str, nodes: list) -> bool:
+        """
+        Insert 'nodes' right before the last assignment of 'settingName'.
+
+        Returns:
+            bool: False if the setting is not in the file.
+        """
+        if settingName not in self.index:
+            return False
+        self._rule(settingName)['before'].extend(self._new_nodes(nodes))
+        return True
+
+    def insert_after(self, settingName: str, nodes: list) -> bool:
+        """
+        Insert 'nodes' right after the last assignment of 'settingName'.
+
+        Like 'list.insert(index + 1, ...)', nodes registered later end up closer to the setting.
+
+        Returns:
+            bool: False if the setting is not in the file.
+        """
+        if settingName not in self.index:
+            return False
+        self._rule(settingName)['after'][0:0] = self._new_nodes(nodes)
+        return True
+
+    def drop(self, dropFilter: Callable[[ast_comments.AST], bool]) -> None:
+        """Drop every top-level node for which 'dropFilter' returns True."""
+        self.dropFilters.append(dropFilter)
+
+    def set_imports(self, nodes: list) -> None:
+        """Remove the 'from ... import ...' statements and put the 'nodes' not already there right after the module docstring."""
+        self.imports = [node for node in nodes if not self._has_statement(node)]
+        self.registered.extend(nodes)
+
+    def append(self, nodes: list) -> None:
+        self.appended.extend(self._new_nodes(nodes))
+
+    def add_comments(self, comments: list) -> None:
+        """Put a comment above each setting. 'comments' is a list of (settingName, commentText) tuples."""
+        for settingName, commentText in comments:
+            self.comments[settingName] = commentText
+
+    def _emit(self, body: list, nodes: list) -> None:
+        for node in nodes:
+            settingName = self.setting_name(node)
+            if settingName in self.comments:
+                commentText = self.comments[settingName]
+                # Unless the comment is already there, from a previous run.
+                if not (body and isinstance(body[-1], ast_comments.Comment) and body[-1].value == commentText):
+                    body.append(literalCache.comment(commentText))
+            body.append(node)
+
+    def commit(self) -> None:
+        """Apply every registered rule in one pass over the module body."""
+        body = []
+        kept = 0
+
+        for position, node in enumerate(self.root.body):
+            if self.imports is not None and isinstance(node, ast_comments.ImportFrom):
+                continue
+
+            if not any(dropFilter(node) for dropFilter in self.dropFilters):
+                settingName = self.setting_name(node)
+                rule = self.rules.get(settingName)
+
+                if rule is None:
+                    self._emit(body, [node])
+                else:
+                    isLast = self.index[settingName][-1] == position
+                    newNode = node
+
+                    if rule['replace'] is not None:
+                        newNode = rule['replace'] if isLast else copy.deepcopy(
+                            rule['replace'])
+                        ast_comments.copy_location(newNode, node)
+
+                    self._emit(body, (rule['before'] if isLast else []) +
+                               [newNode] + (rule['after'] if isLast else []))
+
+            # The imports go at index 1, right after the module docstring.
+            kept += 1
+            if kept == 1 and self.imports is not None:
+                self._emit(body, self.imports)
+
+        if kept == 0 and self.imports is not None:
+            self._emit(body, self.imports)
+
+        self._emit(body, self.appended)
+        self.root.body = body
+
+    def patch(self, source: str, render: Callable[[ast_comments.AST], str]) -> Union[str, None]:
+        """
+        Apply the registered rules to 'source', the text 'root' was parsed from, instead of unparsing the module.
+
+        Each statement a rule changes is spliced in place of its 'lineno'/'end_lineno' span and
+        everything else is kept as it is, so only the new statements need formatting. Replacing
+        a statement with an identical one keeps its text. Inserted statements get a blank line
+        between them and their setting, and the comments inside a replaced statement end up
+        above it, like 'commit()' puts them.
+
+        Args:
+            source (str): The settings.py content.
+            render: Returns the formatted source of a node, ending with a newline.
+
+        Returns:
+            Union[str, None]: The patched content, or None if two statements share a line, which only 'commit()' handles.
+        """
+        lines = source.splitlines(keepends=True)
+        if lines and not lines[-1].endswith('\n'):
+            lines[-1] += '\n'
+
+        # Source line -> position of the statement spanning it, and the comments inside each statement.
+        owners = {}
+        for position, node in enumerate(self.root.body):
+            if not isinstance(node, ast_comments.Comment):
+                for line in range(node.lineno, node.end_lineno + 1):
+                    if line in owners:
+                        return None
+                    owners[line] = position
+
+        attached = {}
+        for node in self.root.body:
+            if isinstance(node, ast_comments.Comment) and node.lineno in owners:
+                attached.setdefault(owners[node.lineno], []).append(node)
+
+        out = []
+
+        def emit_comment(node: ast_comments.AST) -> None:
+            settingName = self.setting_name(node)
+            if settingName in self.comments:
+                commentText = self.comments[settingName]
+                previous = next((line for line in reversed(out) if line.strip()), '')
+                # Unless the comment is already there, from a previous run.
+                if previous.strip() != commentText:
+                    out.append(f"{commentText}\n")
+
+        def emit_new(node: ast_comments.AST) -> None:
+            emit_comment(node)
+            out.extend(render(node).splitlines(keepends=True))
+
+        def emit_replacement(position: int, node: ast_comments.AST, newNode: ast_comments.AST) -> None:
+            if ast_comments.unparse(newNode) == ast_comments.unparse(node):
+                emit_comment(node)
+                out.extend(lines[node.lineno - 1:node.end_lineno])
+                return
+
+            inlineComments = []
+            for comment in attached.get(position, []):
+                if comment.inline and comment.lineno == node.end_lineno:
+                    inlineComments.append(comment.value)
+                else:
+                    out.append(f"{comment.value}\n")
+
+            emit_new(newNode)
+            if inlineComments:
+                out[-1] = f"{out[-1].rstrip()}  {' '.join(inlineComments)}\n"
+
+        nextLine = 1
+        removed = False
+        kept = 0
+
+        for position, node in enumerate(self.root.body):
+            if isinstance(node, ast_comments.Comment) and node.lineno in owners:
+                continue
+
+            # The blank lines before the statement, without doubling them where one was removed.
+            gap = lines[nextLine - 1:node.lineno - 1]
+            if removed and (not out or not out[-1].strip()):
+                while gap and not gap[0].strip():
+                    gap.pop(0)
+            out.extend(gap)
+            nextLine = node.end_lineno + 1
+            removed = False
+
+            if self.imports is not None and isinstance(node, ast_comments.ImportFrom):
+                removed = True
+                continue
+
+            if any(dropFilter(node) for dropFilter in self.dropFilters):
+                removed = True
+            else:
+                settingName = self.setting_name(node)
+                rule = self.rules.get(settingName)
+                isLast = rule is not None and self.index[settingName][-1] == position
+
+                for newNode in (rule['before'] if isLast else []):
+                    emit_new(newNode)
+                    out.append('\n')
+
+                if rule is None or rule['replace'] is None:
+                    emit_comment(node)
+                    out.extend(lines[node.lineno - 1:node.end_lineno])
+                else:
+                    emit_replacement(position, node, rule['replace'])
+
+                for newNode in (rule['after'] if isLast else []):
+                    out.append('\n')
+                    emit_new(newNode)
+
+            # The imports go right after the module docstring.
+            kept += 1
+            if kept == 1 and self.imports is not None:
+                for newNode in self.imports:
+                    emit_new(newNode)
+
+        if kept == 0 and self.imports is not None:
+            for newNode in self.imports:
+                emit_new(newNode)
+
+        out.extend(lines[nextLine - 1:])
+
+        for newNode in self.appended:
+            if out and out[-1].strip():
+                out.append('\n')
+            emit_new(newNode)
+
+        return ''.join(out)
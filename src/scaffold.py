@@ -0,0 +1,223 @@
+import os
+import stat
+import django
+from django.conf import settings
+from django.core.checks.security.base import SECRET_KEY_INSECURE_PREFIX
+from django.core.management.utils import find_formatters, get_random_secret_key, run_formatters
+from django.template import Context, Engine
+from django.utils.version import get_docs_version
+
+
+def _read_umask() -> int:
+    # Linux reports it in /proc, reading it there doesn't change it
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError):
+        pass
+
+    # Elsewhere it can only be read by setting it, which is done once, at import time
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# The process umask, read once: changing it to read it while the scheduler's steps run on other
+# threads would give the files they create in the meantime, like the literal cache, mode 0666.
+_UMASK = _read_umask()
+
+
+def _configure_settings() -> None:
+    # Setup a stub settings environment for template rendering, like TemplateCommand does.
+    if not settings.configured:
+        settings.configure()
+        django.setup()
+
+
+class Scaffold:
+    def __init__(self, projectRoot: str = '.'):
+        """
+        Collect the directories and files of a project skeleton and write them in one pass.
+
+        Django's project and app templates are rendered in-process, the same way
+        'django-admin startproject' and 'manage.py startapp' render them, but straight to
+        their final location and without starting a new interpreter or loading the project.
+
+        Args:
+            projectRoot (str): Directory every path is relative to. Default is the current directory.
+        """
+        self.projectRoot = projectRoot
+        self.dirs = []
+        # Relative path -> {'content': str, 'mode': int | None, 'overwrite': bool}
+        self.files = {}
+        self.renderedDirs = []
+
+    def add_dir(self, path: str) -> None:
+        self.dirs.append(path)
+
+    def add_file(self, path: str, content: str, overwrite: bool = True, mode: int = None) -> None:
+        """
+        Add a file to write.
+
+        Args:
+            path (str): Path relative to the project root.
+            content (str): The file content.
+            overwrite (bool): Replace the file if it exists, otherwise raise FileExistsError. Default is True.
+            mode (int): Permission bits to set, None to keep the default ones.
+        """
+        self.files[path] = {'content': content,
+                            'mode': mode, 'overwrite': overwrite}
+
+    def add_template(self, appOrProject: str, name: str, targetDir: str, extraContext: dict = None) -> None:
+        """
+        Render one of Django's 'app_template'/'project_template' into 'targetDir'.
+
+        Args:
+            appOrProject (str): 'app' or 'project'.
+            name (str): The app or project name.
+            targetDir (str): Where to put the rendered files, relative to the project root.
+            extraContext (dict): Extra template variables, like the project's 'secret_key'.
+        """
+        if not name.isidentifier():
+            raise ValueError(
+                f"'{name}' is not a valid {appOrProject} name. Please make sure the name is a valid identifier.")
+
+        _configure_settings()
+
+        topDir = os.path.abspath(os.path.join(self.projectRoot, targetDir))
+        baseName = f"{appOrProject}_name"
+        context = Context({
+            **(extraContext or {}),
+            baseName: name,
+            f"{appOrProject}_directory": topDir,
+            f"camel_case_{appOrProject}_name": "".join(x for x in name.title() if x != "_"),
+            "docs_version": get_docs_version(),
+            "django_version": django.__version__,
+        }, autoescape=False)
+
+        engine = Engine()
+
+        templateDir = os.path.join(
+            django.__path__[0], 'conf', f"{appOrProject}_template")
+
+        for root, dirs, files in os.walk(templateDir):
+            relativeDir = os.path.relpath(root, templateDir).replace(baseName, name)
+            relativeDir = os.path.normpath(os.path.join(targetDir, relativeDir))
+            self.add_dir(relativeDir)
+
+            dirs[:] = [dirname for dirname in dirs
+                       if not dirname.startswith(".") and dirname != "__pycache__"]
+
+            for filename in files:
+                if filename.endswith((".pyo", ".pyc", ".py.class")):
+                    continue
+
+                oldPath = os.path.join(root, filename)
+                newPath = os.path.join(relativeDir, filename.replace(baseName, name))
+                if newPath.endswith('.py-tpl'):
+                    newPath = newPath[:-len('-tpl')]
+
+                with open(oldPath, encoding="utf-8") as templateFile:
+                    content = templateFile.read()
+                if newPath.endswith('.py'):
+                    content = engine.from_string(content).render(context)
+
+                mode = stat.S_IMODE(os.stat(oldPath).st_mode) & ~_UMASK
+                self.add_file(newPath, content, overwrite=False,
+                              mode=mode | stat.S_IWUSR)
+
+        self.renderedDirs.append(topDir)
+
+    def add_tree(self, sourceDir: str, targetDir: str, extraContext: dict = None) -> int:
+        """
+        Add the files under 'sourceDir' as they are, keeping their layout under 'targetDir'.
+
+        Files that already exist in the project are left alone, they may have been edited since.
+
+        Args:
+            sourceDir (str): Directory to copy.
+            targetDir (str): Where to put the files, relative to the project root.
+            extraContext (dict): If given, the '.py' files are rendered as templates with these
+                variables, like 'add_template()' renders them, e.g. {'project_name': 'root'}.
+
+        Returns:
+            int: The number of files added.
+        """
+        added = 0
+        if extraContext is not None:
+            _configure_settings()
+            engine = Engine()
+            context = Context(extraContext, autoescape=False)
+
+        for root, dirs, files in os.walk(sourceDir):
+            dirs[:] = [dirname for dirname in dirs if dirname != "__pycache__"]
+            relativeDir = os.path.normpath(os.path.join(
+                targetDir, os.path.relpath(root, sourceDir)))
+            self.add_dir(relativeDir)
+
+            for filename in files:
+                if filename.endswith((".pyo", ".pyc")):
+                    continue
+
+                newPath = os.path.join(relativeDir, filename)
+                if os.path.exists(os.path.join(self.projectRoot, newPath)):
+                    continue
+
+                with open(os.path.join(root, filename), encoding="utf-8") as sourceFile:
+                    content = sourceFile.read()
+                if extraContext is not None and newPath.endswith('.py'):
+                    content = engine.from_string(content).render(context)
+
+                self.add_file(newPath, content)
+                added += 1
+
+        return added
+
+    def write(self) -> int:
+        """
+        Create every directory, then write every file.
+
+        Returns:
+            int: The number of files written.
+        """
+        for path, entry in self.files.items():
+            fullPath = os.path.join(self.projectRoot, path)
+            if not entry['overwrite'] and os.path.exists(fullPath):
+                raise FileExistsError(
+                    f"{fullPath} already exists. Overlaying into an existing directory won't replace conflicting files.")
+
+        for path in sorted(set(self.dirs)):
+            os.makedirs(os.path.join(self.projectRoot, path), exist_ok=True)
+
+        for path, entry in self.files.items():
+            fullPath = os.path.join(self.projectRoot, path)
+            with open(fullPath, 'w', encoding="utf-8") as f:
+                f.write(entry['content'])
+            if entry['mode'] is not None:
+                os.chmod(fullPath, entry['mode'])
+
+        # Django formats the rendered templates with black when it's installed, do the same
+        # so the files match what 'startproject'/'startapp' create.
+        if self.renderedDirs:
+            formatterPaths = find_formatters()
+            if formatterPaths['black_path']:
+                run_formatters(self.renderedDirs, **formatterPaths)
+
+        written = len(self.files)
+        self.dirs, self.files, self.renderedDirs = [], {}, []
+        return written
+
+
+def start_project(projectName: str, projectRoot: str = '.') -> int:
+    """
+    In-process equivalent of 'django-admin startproject <projectName> <projectRoot>'.
+
+    Returns:
+        int: The number of files written.
+    """
+    scaffold = Scaffold(projectRoot)
+    scaffold.add_template('project', projectName, '.', {
+        'secret_key': SECRET_KEY_INSECURE_PREFIX + get_random_secret_key()})
+    return scaffold.write()
@@ -0,0 +1,130 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from const import SCHEDULER_MAX_WORKERS
+from tracing import tracer
+
+
+class Step:
+    def __init__(self, name: str, run, reads: tuple = (), writes: tuple = (), category: str = 'step'):
+        """
+        A unit of work of 'StepScheduler' and the resources it uses.
+
+        Args:
+            name (str): Unique name, used in the logs, the trace and the critical path.
+            run: Function called without arguments.
+            reads (tuple): Resources the step only reads, e.g. 'database'.
+            writes (tuple): Resources the step modifies, e.g. 'settings' or 'env'.
+            category (str): Category of the step's trace span. Default is 'step'.
+        """
+        self.name = name
+        self.run = run
+        self.reads = set(reads)
+        self.writes = set(writes)
+        self.category = category
+
+        self.dependencies = []
+        self.start = None
+        self.end = None
+
+    def conflicts_with(self, other: 'Step') -> bool:
+        """Whether the two steps must not run at the same time and must keep their order."""
+        return bool(self.writes & (other.reads | other.writes) or self.reads & other.writes)
+
+    @property
+    def seconds(self) -> float:
+        return self.end - self.start
+
+
+class StepScheduler:
+    def __init__(self, maxWorkers: int = SCHEDULER_MAX_WORKERS):
+        """
+        Run steps on a thread pool, in parallel where they don't share a resource.
+
+        Each step depends on every step added before it that writes a resource it uses, or
+        uses a resource it writes. Steps on the same resource therefore run one at a time in
+        the order they were added, so the result is the same as running everything in order.
+
+        Args:
+            maxWorkers (int): Size of the thread pool. Default is 'SCHEDULER_MAX_WORKERS'.
+        """
+        self.maxWorkers = maxWorkers
+        self.steps = []
+
+    def add(self, name: str, run, reads: tuple = (), writes: tuple = (), category: str = 'step') -> Step:
+        step = Step(name, run, reads, writes, category)
+        step.dependencies = [previous for previous in self.steps
+                             if previous.conflicts_with(step)]
+        self.steps.append(step)
+        return step
+
+    def _run_step(self, step: Step) -> None:
+        step.start = time.perf_counter()
+        try:
+            with tracer.span(step.name, step.category):
+                step.run()
+        finally:
+            step.end = time.perf_counter()
+
+    def run(self) -> None:
+        """
+        Run every step once its dependencies are done.
+
+        If a step raises, no other step is started, the running ones are waited for and the
+        first exception is raised again.
+        """
+        started = set()
+        finished = set()
+        running = {}
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.maxWorkers, thread_name_prefix='step') as executor:
+            while True:
+                if error is None:
+                    # Declaration order, so with a single worker the steps run in the order they were added.
+                    for step in self.steps:
+                        if step.name not in started and all(dependency.name in finished for dependency in step.dependencies):
+                            started.add(step.name)
+                            running[executor.submit(
+                                self._run_step, step)] = step
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    if future.exception() is not None:
+                        error = error or future.exception()
+                    else:
+                        finished.add(step.name)
+
+        if error is not None:
+            raise error
+
+    def critical_path(self) -> tuple:
+        """
+        Return the chain of dependent steps that took the longest, which bounds the total time.
+
+        Returns:
+            tuple: The list of steps on the path, in order, and their total seconds.
+        """
+        longest = {}  # step name -> (seconds up to and including the step, path)
+
+        for step in self.steps:
+            if step.end is None:
+                continue
+
+            seconds, path = max((longest[dependency.name] for dependency in step.dependencies
+                                 if dependency.name in longest), default=(0, []), key=lambda entry: entry[0])
+            longest[step.name] = (seconds + step.seconds, path + [step])
+
+        if not longest:
+            return [], 0
+        seconds, path = max(longest.values(), key=lambda entry: entry[0])
+        return path, seconds
+
+    def format_critical_path(self) -> str:
+        path, seconds = self.critical_path()
+        steps = ' -> '.join(
+            f"{step.name} ({step.seconds * 1000:.1f}ms)" for step in path)
+        return f"{steps}, {seconds * 1000:.1f}ms in total"
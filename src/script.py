@@ -1,89 +1,56 @@
 import ast_comments
-import subprocess
+import copy
 import sys
 import os
 from typing import Union
 from const import *
+from rewriter import SettingsRewriter
+from literals import literalCache
+from envfile import EnvFile
+from formatter import yapfFormatter
+from utils import atomic_write, atomic_write_many
+from scaffold import Scaffold, start_project
+from provisioning import DatabaseProvisioning, container_name
+from readiness import wait_until_ready
+from tracing import tracer
+from scheduler import StepScheduler
+from manifest import TransformManifest, node_hash
+from settingspackage import SettingsPackage
+from concurrent.futures import ProcessPoolExecutor
 import logging
-import colorlog
 import json
-import shutil
+import re
+import time
+from logger import Logger
 
-
-class Logger:
-    def __init__(self, logFileName='script.log', logLevel=logging.INFO):
-        """
-        Initialize the ColoredLogger.
-
-        Args:
-            log_file_name (str): The name of the log file. Default is "script.log".
-            log_level (int): The logging level. Default is INFO.
-        """
-        self.logger = logging.getLogger(__name__)
-        self.logger.setLevel(logLevel)
-
-        formatter = colorlog.ColoredFormatter(
-            "%(log_color)s%(asctime)s [%(levelname)s]: %(message)s",
-            log_colors={
-                'INFO': 'green',
-                'WARNING': 'yellow',
-                'ERROR': 'red',
-            },
-            secondary_log_colors={},
-            style='%'
-        )
-
-        console_handler = colorlog.StreamHandler()
-        console_handler.setFormatter(formatter)
-
-        file_handler = logging.FileHandler(logFileName)
-        file_handler.setFormatter(logging.Formatter(
-            "%(asctime)s [%(levelname)s]: %(message)s"))
-
-        self.logger.addHandler(console_handler)
-        self.logger.addHandler(file_handler)
-
-    def log_info(self, message):
-        """
-        Log an informational message.
-
-        Args:
-            message (str): The message to log.
-        """
-        self.logger.info(message)
-
-    def log_warning(self, message):
-        """
-        Log a warning message.
-
-        Args:
-            message (str): The warning message to log.
-        """
-        self.logger.warning(message)
-
-    def log_error(self, message):
-        """
-        Log an error message.
-
-        Args:
-            message (str): The error message to log.
-        """
-        self.logger.error(message)
+# Files added to the generated 'home' app by the options, e.g. 'home_jinja2' with '--jinja2'
+APP_FILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app_files')
 
 
 class EditSettings(Logger):
-    def __init__(self, projectName: str, settingsPath: str, dbType: Union[str, None], databaseDict: dict, htmx: str, smtp: str, logFileName='script.log', logLevel=logging.INFO):
+    def __init__(self, projectName: str, settingsPath: str, dbType: Union[str, None], databaseDict: dict, htmx: str, smtp: str, projectRoot: str = '.', logFileName='script.log', logLevel=logging.INFO, patch: bool = False,
+                 dbPooling: str = '', cache: str = '', jinja2: bool = False, assets: bool = False,
+                 asgi: bool = False):
         """
         Class for modifying a Django project's settings.py file.
 
         This class facilitates the addition of necessary imports, modifications to the database configuration, and fixes for code indentation.
 
         Args:
-            settingsPath (str): Path to settings.py
+            settingsPath (str): Path to settings.py, or to a settings package directory ('settings/base.py', 'dev.py', ...)
             dbType (Union[str, None]): The type of database to use. It can be one of the following values: mysql, postgre or None.
             projectName (str): Project name
+            projectRoot (str): Directory of the project, where '.env', 'apps' and 'staticfiles' live. Default is the current directory.
+            patch (bool): Splice the changed settings into the original source instead of rewriting and reformatting the whole file. Default is False.
+            dbPooling (str): 'app' for persistent connections and a connection pool in the generated DATABASES, 'pgbouncer' to also
+                put a PgBouncer container in front of a provisioned PostgreSQL. Default is '', no pooling.
+            cache (str): Cache backend, one of 'CACHE_BACKENDS', also used by the sessions. Default is '', Django's default cache.
+            jinja2 (bool): Add a Jinja2 backend to TEMPLATES, before Django's. Default is False.
+            assets (bool): Fingerprinted static files served by WhiteNoise, and the 'buildassets' command. Default is False.
+            asgi (bool): ASGI_APPLICATION, async views in the 'home' app and a 'gunicorn.conf.py' with uvicorn workers. Default is False.
         """
         super().__init__(logFileName, logLevel)
+        self.projectRoot = projectRoot
         self.settingsPath = settingsPath
         self.dbType = dbType
         self.projectName = projectName
@@ -100,416 +67,610 @@ class EditSettings(Logger):
 
         self.htmx = True if htmx == "true" else False
         self.smtp = True if smtp == "true" else False
+        self.patch = patch
+        self.dbPooling = dbPooling
+        self.pooler = 'pgbouncer' if dbPooling == 'pgbouncer' and dbType == 'postgre' else None
+        self.cache = cache
+        self.jinja2 = jinja2
+        self.assets = assets
+        self.asgi = asgi
+
+        # Set by '_join_cache()' once the cache backend can be used
+        self.cacheReady = False
+        self.cacheProvisioning = None
+
+        # Set by '_join_database()' once the provisioned database accepts connections
+        self.databaseReady = False
+
+        # Set by 'edit_settings_module()' when 'settingsPath' is a module of a settings package
+        self.packageModule = False
+
+        # Every step writes here, the file itself is only written at the end of 'edit()'
+        self.env = EnvFile(os.path.join(self.projectRoot, '.env'))
 
     def parse_file(self) -> ast_comments.Module:
         with open(self.settingsPath, 'r') as f:
-            fileContent = f.read()
+            self.source = f.read()
 
         # Parse the settings.py
-        return ast_comments.parse(fileContent)
+        return ast_comments.parse(self.source)
 
-    def unparse_and_save_file(self) -> None:
-        unparsedFile = ast_comments.unparse(self.root)
-        with open(self.settingsPath, 'w') as f:
-            f.write(unparsedFile)
-        self.log_info("'settings.py' correctly edited.")
+    def unparse_file(self) -> str:
+        return ast_comments.unparse(self.root)
 
-    def add_blank_lines(self) -> None:
+    def add_blank_lines(self, content: str) -> str:
         """This method will just add blank lines to make the file more readable."""
 
-        with open(self.settingsPath, 'r') as f:
-            lines = f.readlines()
-
-            modifiedLines = []
+        modifiedLines = []
 
-            for line in lines:
-                modifiedLines.append(line)
-                if line.strip().endswith(']') or line.strip().endswith('}') or line.strip().endswith(')') or line.strip().endswith("'") or line.strip().endswith('True'):
-                    modifiedLines.append('\n')
+        for line in content.split('\n'):
+            modifiedLines.append(line)
+            if line.rstrip().endswith(BLANK_LINE_AFTER):
+                modifiedLines.append('')
 
-            with open(self.settingsPath, 'w') as f:
-                f.writelines(modifiedLines)
+        return '\n'.join(modifiedLines)
 
-    def format_file(self) -> None:
+    def format_file(self, content: str) -> str:
         """Format 'settings.py' with yapf"""
 
-        command = f"yapf -i --style='{YAPF_STYLE}' {self.settingsPath}"
-        subprocess.run(command, shell=True, check=True)
-        self.log_info("'settings.py' correctly formatted.")
+        return yapfFormatter.format(content)
+
+    def render_node(self, node: ast_comments.AST) -> str:
+        return self.format_file(ast_comments.unparse(node) + '\n')
+
+    def patch_content(self) -> str:
+        """
+        Return the settings with the rewriter's rules spliced into the original source, see 'SettingsRewriter.patch()'.
+
+        Files it can't patch, with several statements on a line, go through the whole output pipeline instead.
+        """
+        content = self.rewriter.patch(self.source, self.render_node)
+        if content is not None:
+            return content
+
+        self.log_warning(
+            "Couldn't patch the settings, some statements share a line. Rewriting the whole file.")
+        self.rewriter.commit()
+        return self.format_file(self.add_blank_lines(self.unparse_file()))
+
+    def unparse_and_save_file(self) -> None:
+        """
+        Run the output pipeline: unparse the settings, add the blank lines and format them, all in memory,
+        then write settings.py once through a temporary file.
+
+        In patch mode the changes are spliced into the original source instead, see 'patch_content()'.
+
+        The time spent in each stage and the bytes written are logged and kept in 'self.outputStats'.
+        """
+        if self.patch:
+            stages = [('patch', lambda _: self.patch_content())]
+        else:
+            stages = [('unparse', lambda _: self.unparse_file()),
+                      ('blank lines', self.add_blank_lines),
+                      ('format', self.format_file)]
+
+        self.outputStats = {}
+        content = None
+
+        for stageName, stage in stages:
+            start = time.perf_counter()
+            with tracer.span(stageName, 'output'):
+                content = stage(content)
+            self.outputStats[stageName] = time.perf_counter() - start
+
+        if content == self.source:
+            self.log_info("'settings.py' is already up to date.")
+            return
+
+        start = time.perf_counter()
+        encodedContent = content.encode()
+        with tracer.span('write', 'output'):
+            atomic_write(self.settingsPath, encodedContent, 'wb')
+        self.outputStats['write'] = time.perf_counter() - start
+        self.outputStats['bytes'] = len(encodedContent)
+
+        timings = ', '.join(f"{stageName}: {seconds * 1000:.1f}ms" for stageName, seconds in self.outputStats.items()
+                            if stageName != 'bytes')
+        self.log_info(
+            f"'settings.py' correctly edited and formatted, {self.outputStats['bytes']} bytes written ({timings}).")
 
     def _add_imports(self) -> None:
 
         # Remove the 'from pathlib import Path' which would be useless.
-        for node in ast_comments.walk(self.root):
-            if isinstance(node, ast_comments.ImportFrom):
-                self.root.body.remove(node)
-
+        importNodes = []
         for module in MODULES_TO_IMPORT:
             importNode = ast_comments.Import(
                 names=[ast_comments.alias(name=module, asname=None)])
 
-            self.root.body.insert(1, importNode)
+            importNodes.insert(0, importNode)
 
+        self.rewriter.set_imports(importNodes)
         self.log_info("Added necessary imports.")
 
     def _add_base_dir(self) -> None:
-        for node in ast_comments.walk(self.root):
-            if isinstance(node, ast_comments.Comment):
-                if "# Build paths" in node.value:
-                    self.root.body.remove(node)
-
-                elif "# SECURITY WARNING:" in node.value:
-                    self.root.body.remove(node)
-
-        for node in ast_comments.walk(self.root):
+        def is_replaced_comment(node: ast_comments.AST) -> bool:
+            return isinstance(node, ast_comments.Comment) and ("# Build paths" in node.value or "# SECURITY WARNING:" in node.value)
 
-            if isinstance(node, ast_comments.Assign) and isinstance(node.targets[0], ast_comments.Name) and node.targets[0].id == 'BASE_DIR':
-                baseDirNodeToReplace = node
-                baseDirNodeIndex = self.root.body.index(node)
+        self.rewriter.drop(is_replaced_comment)
 
-                baseDirNode = ast_comments.parse(LITERAL_BASE_DIR).body[0]
-
-                ast_comments.copy_location(baseDirNode, baseDirNodeToReplace)
-                self.root.body.remove(baseDirNodeToReplace)
-                self.root.body.insert(baseDirNodeIndex, baseDirNode)
+        baseDirNode = literalCache.node(
+            LITERAL_BASE_DIR_PACKAGE if self.packageModule else LITERAL_BASE_DIR)
+        self.rewriter.replace('BASE_DIR', baseDirNode)
 
         self.log_info("Added BASE_DIR.")
 
     def _add_root_dir(self) -> None:
-        for node in ast_comments.walk(self.root):
-            if isinstance(node, ast_comments.Assign) and isinstance(node.targets[0], ast_comments.Name) and node.targets[0].id == 'BASE_DIR':
-                baseDirNodeIndex = self.root.body.index(node)
+        rootDirNode = literalCache.node(
+            LITERAL_ROOT_DIR_PACKAGE if self.packageModule else LITERAL_ROOT_DIR)
 
-        rootDirNode = ast_comments.parse(LITERAL_ROOT_DIR).body[0]
-        self.root.body.insert(baseDirNodeIndex + 1, rootDirNode)
-        self.log_info("Added ROOT_DIR.")
+        if self.rewriter.insert_after('BASE_DIR', [rootDirNode]):
+            self.log_info("Added ROOT_DIR.")
+        else:
+            self.log_warning("Couldn't add ROOT_DIR, BASE_DIR not found.")
 
     def _add_env(self) -> None:
-        for node in ast_comments.walk(self.root):
-            if isinstance(node, ast_comments.Assign) and isinstance(node.targets[0], ast_comments.Name) and node.targets[0].id == 'SECRET_KEY':
-                debugNodeIndex = self.root.body.index(node)
-
-        envNode = ast_comments.parse(LITERAL_ENV).body[0]
-        self.root.body.insert(debugNodeIndex, envNode)
+        envNode = literalCache.node(LITERAL_ENV)
+        readEnvNode = literalCache.node(LITERAL_READ_ENV)
 
-        readEnvNode = ast_comments.parse(LITERAL_READ_ENV).body[0]
-        self.root.body.insert(debugNodeIndex + 1, readEnvNode)
-        self.log_info("Added ENV and read_env.")
+        if self.rewriter.insert_before('SECRET_KEY', [envNode, readEnvNode]):
+            self.log_info("Added ENV and read_env.")
+        else:
+            self.log_warning("Couldn't add ENV and read_env, SECRET_KEY not found.")
 
     def _add_secret_key(self) -> None:
         def _save_secret_key(secretKey: str) -> None:
-            with open('.env', 'a') as env:
-                env.write(f"DJANGO_SECRET_KEY='{secretKey}'\n\n")
+            self.env.set('DJANGO_SECRET_KEY', secretKey)
 
-        for node in ast_comments.walk(self.root):
-            if isinstance(node, ast_comments.Assign) and isinstance(node.targets[0], ast_comments.Name) and node.targets[0].id == 'SECRET_KEY':
-                secretKeyNodeToReplace = node
-                secretKeyNodeIndex = self.root.body.index(node)
+        secretKeyNodeToReplace = self.rewriter.find('SECRET_KEY')
 
-                secretKeyNode = ast_comments.parse(LITERAL_SECRET_KEY).body[0]
-                secretKey = secretKeyNodeToReplace.value.s
+        if secretKeyNodeToReplace is not None:
+            secretKeyNode = literalCache.node(LITERAL_SECRET_KEY)
 
-                _save_secret_key(secretKey)
+            # Unless it was already moved to '.env' by a previous run
+            secretKeyValue = secretKeyNodeToReplace.value
+            if isinstance(secretKeyValue, ast_comments.Constant) and isinstance(secretKeyValue.value, str):
+                _save_secret_key(secretKeyValue.value)
 
-                ast_comments.copy_location(
-                    secretKeyNode, secretKeyNodeToReplace)
-
-                self.root.body.remove(secretKeyNodeToReplace)
-                self.root.body.insert(secretKeyNodeIndex, secretKeyNode)
-
-                self.log_info("Added SECRET_KEY.")
+            self.rewriter.replace('SECRET_KEY', secretKeyNode)
+            self.log_info("Added SECRET_KEY.")
 
     def _add_debug(self) -> None:
         def add_inside_env() -> None:
-            with open('.env', 'a') as env:
-                env.write(f"DEBUG=True\n\n")
-
-        for node in ast_comments.walk(self.root):
+            self.env.setdefault('DEBUG', True, quoted=False)
 
-            if isinstance(node, ast_comments.Assign) and isinstance(node.targets[0], ast_comments.Name) and node.targets[0].id == 'DEBUG':
-                debugNodeToReplace = node
-                debugNodeIndex = self.root.body.index(node)
+        debugNode = literalCache.node(LITERAL_DEBUG)
 
-                debugNode = ast_comments.parse(LITERAL_DEBUG).body[0]
-
-                ast_comments.copy_location(debugNode, debugNodeToReplace)
-                self.root.body.remove(debugNodeToReplace)
-                self.root.body.insert(debugNodeIndex, debugNode)
-                add_inside_env()
+        if self.rewriter.replace('DEBUG', debugNode):
+            add_inside_env()
 
-                self.log_info("Added DEBUG.")
+            self.log_info("Added DEBUG.")
 
     def _add_assets_root(self) -> None:
         def add_inside_env() -> None:
-            with open('.env', 'a') as env:
-                env.write(f"ASSETS_ROOT='{DEFAULT_ASSETS_ROOT}'\n\n")
+            self.env.setdefault('ASSETS_ROOT', DEFAULT_ASSETS_ROOT)
 
-        for node in ast_comments.walk(self.root):
-            if isinstance(node, ast_comments.Assign) and isinstance(node.targets[0], ast_comments.Name) and node.targets[0].id == 'DEBUG':
-                debugNodeIndex = self.root.body.index(node)
+        assetsRootNode = literalCache.node(LITERAL_ASSETS_ROOT)
 
-        add_inside_env()
-        assetsRootNode = ast_comments.parse(LITERAL_ASSETS_ROOT).body[0]
-        self.root.body.insert(debugNodeIndex + 1, assetsRootNode)
-        self.log_info("Added ASSETS_ROOT.")
+        if self.rewriter.insert_after('DEBUG', [assetsRootNode]):
+            add_inside_env()
+            self.log_info("Added ASSETS_ROOT.")
+        else:
+            self.log_warning("Couldn't add ASSETS_ROOT, DEBUG not found.")
 
     def _add_allowed_hosts(self) -> None:
-        for node in ast_comments.walk(self.root):
+        allowedHostsNode = literalCache.node(LITERAL_ALLOWED_HOSTS)
 
-            if isinstance(node, ast_comments.Assign) and isinstance(node.targets[0], ast_comments.Name) and node.targets[0].id == 'ALLOWED_HOSTS':
-                allowedHostsNodeToReplace = node
-                allowedHostsNodeIndex = self.root.body.index(node)
-
-                allowedHostsNode = ast_comments.parse(
-                    LITERAL_ALLOWED_HOSTS).body[0]
-
-                ast_comments.copy_location(
-                    allowedHostsNode, allowedHostsNodeToReplace)
-                self.root.body.remove(allowedHostsNodeToReplace)
-                self.root.body.insert(
-                    allowedHostsNodeIndex, allowedHostsNode)
-                self.log_info("Added ALLOWED_HOSTS.")
+        if self.rewriter.replace('ALLOWED_HOSTS', allowedHostsNode):
+            self.log_info("Added ALLOWED_HOSTS.")
 
     def _add_csrf_trusted(self) -> None:
         def add_inside_env() -> None:
-            with open('.env', 'a') as env:
-                env.write(f"SERVER=''\n\n")
+            self.env.setdefault('SERVER', '')
 
-        for node in ast_comments.walk(self.root):
-            if isinstance(node, ast_comments.Assign) and isinstance(node.targets[0], ast_comments.Name) and node.targets[0].id == 'ALLOWED_HOSTS':
-                allowedHostsNodeIndex = self.root.body.index(node)
+        csrfTrustedNode = literalCache.node(LITERAL_CSRF_TRUSTED_ORIGINS)
 
-        csrfTrustedNode = ast_comments.parse(
-            LITERAL_CSRF_TRUSTED_ORIGINS).body[0]
-        self.root.body.insert(allowedHostsNodeIndex + 1, csrfTrustedNode)
-        add_inside_env()
-        self.log_info("Added CSRF_TRUSTED_ORIGINS.")
+        if self.rewriter.insert_after('ALLOWED_HOSTS', [csrfTrustedNode]):
+            add_inside_env()
+            self.log_info("Added CSRF_TRUSTED_ORIGINS.")
+        else:
+            self.log_warning(
+                "Couldn't add CSRF_TRUSTED_ORIGINS, ALLOWED_HOSTS not found.")
 
     def _add_installed_apps(self) -> None:
-        for node in ast_comments.walk(self.root):
-
-            if isinstance(node, ast_comments.Assign) and isinstance(node.targets[0], ast_comments.Name) and node.targets[0].id == 'INSTALLED_APPS':
-                installedAppsNodeToReplace = node
-                installedAppsNodeIndex = self.root.body.index(node)
-
-                if self.htmx:
-                    installedAppsNode = ast_comments.parse(
-                        LITERAL_INSTALLED_APPS_HTMX).body[0]
-                else:
-                    installedAppsNode = ast_comments.parse(
-                        LITERAL_INSTALLED_APPS).body[0]
-
-                ast_comments.copy_location(installedAppsNode,
-                                           installedAppsNodeToReplace)
-                self.root.body.remove(installedAppsNodeToReplace)
-                self.root.body.insert(
-                    installedAppsNodeIndex, installedAppsNode)
-                self.log_info("Added INSTALLED_APPS.")
+        if self.htmx:
+            installedAppsNode = literalCache.node(LITERAL_INSTALLED_APPS_HTMX)
+        else:
+            installedAppsNode = literalCache.node(LITERAL_INSTALLED_APPS)
+
+        if self.rewriter.replace('INSTALLED_APPS', installedAppsNode):
+            self.log_info("Added INSTALLED_APPS.")
 
     def _add_middleware(self) -> None:
         if self.htmx:
-            for node in ast_comments.walk(self.root):
+            middlewareNode = literalCache.node(LITERAL_MIDDLEWARE)
+        elif self.assets and self.rewriter.has('MIDDLEWARE'):
+            middlewareNode = copy.deepcopy(self.rewriter.find('MIDDLEWARE'))
+        else:
+            return
 
-                if isinstance(node, ast_comments.Assign) and isinstance(node.targets[0], ast_comments.Name) and node.targets[0].id == 'MIDDLEWARE':
-                    middlewareNodeToReplace = node
-                    middlewaresNodeIndex = self.root.body.index(node)
+        if self.assets:
+            add_middleware(middlewareNode, WHITENOISE_MIDDLEWARE, after=SECURITY_MIDDLEWARE)
 
-                    middlewareNode = ast_comments.parse(
-                        LITERAL_MIDDLEWARE).body[0]
-
-                    ast_comments.copy_location(middlewareNode,
-                                               middlewareNodeToReplace)
-                    self.root.body.remove(middlewareNodeToReplace)
-                    self.root.body.insert(
-                        middlewaresNodeIndex, middlewareNode)
-                    self.log_info("Added MIDDLEWARE with HTMX.")
+        if self.rewriter.replace('MIDDLEWARE', middlewareNode):
+            self.log_info(
+                f"Added MIDDLEWARE with {' and '.join(name for name, enabled in [('HTMX', self.htmx), ('WhiteNoise', self.assets)] if enabled)}.")
 
     def _add_template_dir(self) -> None:
-        for node in ast_comments.walk(self.root):
-            if isinstance(node, ast_comments.Assign) and isinstance(node.targets[0], ast_comments.Name) and node.targets[0].id == 'ROOT_URLCONF':
-                rootUrlIndex = self.root.body.index(node)
+        templateDirNode = literalCache.node(LITERAL_TEMPLATE_DIR)
 
-        templateDirNode = ast_comments.parse(LITERAL_TEMPLATE_DIR).body[0]
-        self.root.body.insert(rootUrlIndex + 1, templateDirNode)
-        self.log_info("Added TEMPLATE_DIR.")
+        if self.rewriter.insert_after('ROOT_URLCONF', [templateDirNode]):
+            self.log_info("Added TEMPLATE_DIR.")
+        else:
+            self.log_warning("Couldn't add TEMPLATE_DIR, ROOT_URLCONF not found.")
 
     def _add_templates(self) -> None:
-        for node in ast_comments.walk(self.root):
-
-            if isinstance(node, ast_comments.Assign) and isinstance(node.targets[0], ast_comments.Name) and node.targets[0].id == 'TEMPLATES':
-                templatesNodeToReplace = node
-                templatesNodeIndex = self.root.body.index(node)
-
-                templatesNode = ast_comments.parse(LITERAL_TEMPLATES).body[0]
+        templatesNode = literalCache.node(
+            LITERAL_TEMPLATES_JINJA2 if self.jinja2 else LITERAL_TEMPLATES)
+        templateLoadersNode = literalCache.node(LITERAL_TEMPLATE_LOADERS)
 
-                ast_comments.copy_location(templatesNode,
-                                           templatesNodeToReplace)
-                self.root.body.remove(templatesNodeToReplace)
-                self.root.body.insert(
-                    templatesNodeIndex, templatesNode)
-                self.log_info("Added TEMPLATES.")
+        if self.rewriter.replace('TEMPLATES', templatesNode):
+            self.rewriter.insert_before('TEMPLATES', [templateLoadersNode])
+            self.log_info(
+                f"Added TEMPLATES{' with Jinja2' if self.jinja2 else ''}.")
 
     def _add_database(self) -> None:
         """
         This method modifies the 'DATABASES' dict within the settings.py file to configure database settings
         according to the specified 'dbType'. It supports 'mysql' and 'postgres' database types.
+
+        When the database is provisioned, this joins the provisioning started by '_start_database()'.
+        """
+        self._join_database()
+        self._add_databases_setting()
+
+    def _join_database(self) -> None:
+        """
+        Wait for the database provisioning, or add the credentials the user gave to '.env'.
+
+        'self.databaseReady' tells '_add_databases_setting()' whether DATABASES can use the new database.
         """
         def add_inside_env_mysql() -> None:
-            with open('.env', 'a') as env:
-                env.write("# MySQL credentials:\n")
-                env.write(
-                    f"MYSQL_NAME='{self.databaseDict.get('MYSQL_NAME')}'\n")
-                env.write(
-                    f"MYSQL_HOST='{self.databaseDict.get('MYSQL_HOST')}'\n")
-                env.write(
-                    f"MYSQL_PORT='{self.databaseDict.get('MYSQL_PORT')}'\n")
-                env.write(
-                    f"MYSQL_USER='{self.databaseDict.get('MYSQL_USER')}'\n")
-                env.write(
-                    f"MYSQL_PASSWORD='{self.databaseDict.get('MYSQL_PASSWORD')}'\n\n")
+            for key in ['MYSQL_NAME', 'MYSQL_HOST', 'MYSQL_PORT', 'MYSQL_USER', 'MYSQL_PASSWORD']:
+                self.env.set(key, self.databaseDict.get(key),
+                             section="MySQL credentials")
 
         def add_inside_env_postgres() -> None:
-            with open('.env', 'a') as env:
-                env.write("# PostgreSQL credentials:\n")
-                env.write(
-                    f"POSTGRESQL_NAME='{self.databaseDict.get('POSTGRESQL_NAME')}'\n")
-                env.write(
-                    f"POSTGRESQL_HOST='{self.databaseDict.get('POSTGRESQL_HOST')}'\n")
-                env.write(
-                    f"POSTGRESQL_PORT='{self.databaseDict.get('POSTGRESQL_PORT')}'\n")
-                env.write(
-                    f"POSTGRESQL_USER='{self.databaseDict.get('POSTGRESQL_USER')}'\n")
-                env.write(
-                    f"POSTGRESQL_PASSWORD='{self.databaseDict.get('POSTGRESQL_PASSWORD')}'\n\n")
+            for key in ['POSTGRESQL_NAME', 'POSTGRESQL_HOST', 'POSTGRESQL_PORT', 'POSTGRESQL_USER', 'POSTGRESQL_PASSWORD']:
+                self.env.set(key, self.databaseDict.get(key),
+                             section="PostgreSQL credentials")
 
         if self.dbType == "mysql":
             if self.databaseDict is None:  # If the user didn't specify the database credentials
-                if setup_mysql(self.projectName, self):
-                    for node in ast_comments.walk(self.root):
-                        if isinstance(node, ast_comments.Assign) and isinstance(node.targets[0], ast_comments.Name) and node.targets[0].id == 'DATABASES':
-                            databasesToReplace = node
-                            databasesIndex = self.root.body.index(node)
-
-                    databasesNode = ast_comments.parse(LITERAL_MYSQL).body[0]
-
-                    ast_comments.copy_location(
-                        databasesNode, databasesToReplace)
-                    self.root.body.remove(databasesToReplace)
-                    self.root.body.insert(databasesIndex, databasesNode)
-                    self.log_info("Added DATABASES (MySQL).")
-                else:
+                self.databaseReady = setup_mysql(
+                    self.projectName, self, self.env, self.provisioning)
+                if not self.databaseReady:
                     self.log_error("Couldn't create the MySQL database.")
             else:
                 add_inside_env_mysql()
                 self.log_info("Added MySQL credentials to '.env'.")
+                self._use_given_database()
 
         elif self.dbType == "postgre":
             if self.databaseDict is None:  # If the user didn't specify the database credentials
-                if setup_postgre(self.projectName, self):
-                    for node in ast_comments.walk(self.root):
-                        if isinstance(node, ast_comments.Assign) and isinstance(node.targets[0], ast_comments.Name) and node.targets[0].id == 'DATABASES':
-                            databasesToReplace = node
-                            databasesIndex = self.root.body.index(node)
-
-                    databasesNode = ast_comments.parse(
-                        LITERAL_POSTGRESQL).body[0]
-
-                    ast_comments.copy_location(
-                        databasesNode, databasesToReplace)
-                    self.root.body.remove(databasesToReplace)
-                    self.root.body.insert(databasesIndex, databasesNode)
-                    self.log_info("Added DATABASES (PostgreSQL).")
-                else:
+                self.databaseReady = setup_postgre(
+                    self.projectName, self, self.env, self.provisioning)
+                if not self.databaseReady:
                     self.log_error(
                         "Couldn't create the PostgreSQL database.")
             else:
                 add_inside_env_postgres()
                 self.log_info("Added PostgreSQL credentials to '.env'.")
+                self._use_given_database()
 
-    def _add_static_root(self) -> None:
-        for node in ast_comments.walk(self.root):
+    def _use_given_database(self) -> None:
+        """
+        With '--db-pooling', let '_add_databases_setting()' replace DATABASES for the credentials the user gave too.
 
-            if isinstance(node, ast_comments.Assign) and isinstance(node.targets[0], ast_comments.Name) and node.targets[0].id == 'STATIC_URL':
-                staticUrlNodeIndex = self.root.body.index(node)
+        The pooled DATABASES reads them from '.env' like the provisioned ones. Without pooling, DATABASES is left as it is.
+        """
+        if self.dbPooling:
+            self.databaseReady = True
+            if self.dbPooling == 'pgbouncer':
+                self.pooler = None
+                self.log_warning(
+                    "PgBouncer is only started for a provisioned PostgreSQL, the connections to the given database are pooled by Django.")
+
+    def _add_databases_setting(self) -> None:
+        if not self.databaseReady:
+            return
+
+        if self.dbType == "mysql":
+            if self.rewriter.replace('DATABASES', literalCache.node(LITERAL_MYSQL_POOLED if self.dbPooling else LITERAL_MYSQL)):
+                self._add_pooling_env()
+                self.log_info("Added DATABASES (MySQL).")
 
-                staticRootNode = ast_comments.parse(
-                    LITERAL_STATIC_ROOT).body[0]
-                self.root.body.insert(staticUrlNodeIndex, staticRootNode)
-                self.log_info("Added STATIC_ROOT.")
+        elif self.dbType == "postgre":
+            if self.rewriter.replace('DATABASES', literalCache.node(LITERAL_POSTGRESQL_POOLED if self.dbPooling else LITERAL_POSTGRESQL)):
+                self._add_pooling_env()
+                self.log_info("Added DATABASES (PostgreSQL).")
+
+    def _add_pooling_env(self) -> None:
+        """
+        Add the '.env' keys the pooled DATABASES setting reads.
+
+        Behind PgBouncer in transaction mode, Django keeps persistent connections to the pooler
+        instead of a pool of its own, and can't use server-side cursors.
+        """
+        if not self.dbPooling:
+            return
+
+        section = "Database connections"
+        self.env.setdefault('DB_CONN_MAX_AGE', DB_CONN_MAX_AGE,
+                            quoted=False, section=section)
+        self.env.setdefault('DB_CONN_HEALTH_CHECKS', DB_CONN_HEALTH_CHECKS,
+                            quoted=False, section=section)
+
+        if self.dbType == "mysql":
+            self.env.setdefault('MYSQL_CONNECT_TIMEOUT', MYSQL_CONNECT_TIMEOUT,
+                                quoted=False, section=section)
+
+        elif self.dbType == "postgre":
+            self.env.set('POSTGRESQL_POOL', self.pooler is None,
+                         quoted=False, section=section)
+            self.env.setdefault('POSTGRESQL_POOL_MIN_SIZE', POSTGRESQL_POOL_MIN_SIZE,
+                                quoted=False, section=section)
+            self.env.setdefault('POSTGRESQL_POOL_MAX_SIZE', POSTGRESQL_POOL_MAX_SIZE,
+                                quoted=False, section=section)
+            self.env.setdefault('POSTGRESQL_POOL_TIMEOUT', POSTGRESQL_POOL_TIMEOUT,
+                                quoted=False, section=section)
+            self.env.set('POSTGRESQL_DISABLE_SERVER_SIDE_CURSORS', self.pooler is not None,
+                         quoted=False, section=section)
+
+        self.log_info("Added the connection pooling settings to '.env'.")
+
+    def _start_database(self) -> None:
+        """Start provisioning the database container in the background, so the other steps don't wait for it."""
+        self.provisioning = None
+
+        if self.dbType in ("mysql", "postgre") and self.databaseDict is None:
+            if self.dbPooling == 'pgbouncer' and self.pooler is None:
+                self.log_warning(
+                    "PgBouncer only pools PostgreSQL connections, the MySQL ones are pooled by Django.")
+
+            self.provisioning = DatabaseProvisioning(
+                self.dbType, self.projectName, pooler=self.pooler).start()
+            self.log_info("Started the database provisioning in the background.")
+
+    def _start_cache(self) -> None:
+        """Start the cache container in the background, like '_start_database()'."""
+        self.cacheProvisioning = None
+
+        if self.cache in ('redis', 'memcached'):
+            self.cacheProvisioning = DatabaseProvisioning(
+                self.cache, self.projectName).start()
+            self.log_info("Started the cache provisioning in the background.")
+
+    def _add_cache(self) -> None:
+        """Add the CACHES setting of the 'cache' backend and keep the sessions in it, joining the cache provisioning."""
+        self._join_cache()
+        self._add_caches_setting()
+
+    def _join_cache(self) -> None:
+        if not self.cache:
+            return
+
+        if self.cache in ('redis', 'memcached'):
+            self.cacheReady = setup_cache(
+                self.cache, self.projectName, self, self.env, self.cacheProvisioning)
+            if not self.cacheReady:
+                self.log_error(
+                    f"Couldn't create the {self.cache} cache, keeping the default cache and sessions.")
+        else:
+            self.cacheReady = True
+
+    def _add_caches_setting(self) -> None:
+        if not self.cacheReady:
+            return
+
+        cachesNode = literalCache.node(CACHES_LITERALS[self.cache])
+        sessionEngineNode = literalCache.node(LITERAL_SESSION_ENGINE)
+
+        self.rewriter.append([cachesNode, sessionEngineNode])
+        self.log_info(f"Added CACHES ({self.cache}) and cached sessions.")
+
+    def _reserve_database_env(self) -> None:
+        """Keep the place of the database credentials in '.env', they are only added once '_add_database()' runs."""
+        if self.dbType == "mysql":
+            self.env.add_section("MySQL credentials")
+        elif self.dbType == "postgre":
+            self.env.add_section("PostgreSQL credentials")
+
+    def _add_static_root(self) -> None:
+        staticRootNode = literalCache.node(LITERAL_STATIC_ROOT)
+
+        if self.rewriter.insert_before('STATIC_URL', [staticRootNode]):
+            self.log_info("Added STATIC_ROOT.")
 
     def _add_static_files_dirs(self) -> None:
-        for node in ast_comments.walk(self.root):
+        staticFilesDirNode = literalCache.node(LITERAL_STATICFILES_DIRS)
+
+        if self.rewriter.insert_after('STATIC_URL', [staticFilesDirNode]):
+            self.log_info("Added STATICFILES_DIRS.")
+
+    def _add_asgi_application(self) -> None:
+        if not self.asgi:
+            return
 
-            if isinstance(node, ast_comments.Assign) and isinstance(node.targets[0], ast_comments.Name) and node.targets[0].id == 'STATIC_URL':
-                staticFilesDirIndex = self.root.body.index(node)
+        wsgiApplicationNode = self.rewriter.find('WSGI_APPLICATION')
+        if wsgiApplicationNode is None or not isinstance(wsgiApplicationNode.value, ast_comments.Constant):
+            self.log_warning("Couldn't add ASGI_APPLICATION, WSGI_APPLICATION not found.")
+            return
 
-                staticFilesDirNode = ast_comments.parse(
-                    LITERAL_STATICFILES_DIRS).body[0]
-                self.root.body.insert(
-                    staticFilesDirIndex + 1, staticFilesDirNode)
-                self.log_info("Added STATICFILES_DIRS.")
+        asgiApplicationNode = literalCache.node(LITERAL_ASGI_APPLICATION)
+        asgiApplicationNode.value.value = re.sub(
+            r'\.wsgi\.application$', '.asgi.application', wsgiApplicationNode.value.value)
+
+        if self.rewriter.insert_after('WSGI_APPLICATION', [asgiApplicationNode]):
+            self.log_info("Added ASGI_APPLICATION.")
+
+    def _add_storages(self) -> None:
+        if not self.assets:
+            return
+
+        storagesNode = literalCache.node(LITERAL_STORAGES)
+
+        if self.rewriter.insert_after('STATIC_URL', [storagesNode]):
+            self.log_info("Added STORAGES with fingerprinted static files.")
+        else:
+            self.log_warning("Couldn't add STORAGES, STATIC_URL not found.")
 
     def _add_smtp(self) -> None:
         """
         This method will add the SMTP configuration to the settings.py file.
         """
         def add_inside_env() -> None:
-            with open('.env', 'a') as env:
-                env.write("# SMTP configuration:\n")
-                env.write(f"EMAIL_HOST=''\n")
-                env.write(f"EMAIL_USE_TLS=''\n")
-                env.write(f"EMAIL_PORT=''\n")
-                env.write(f"EMAIL_USE_SSL=''\n")
-                env.write(f"EMAIL_HOST_USER=''\n")
-                env.write(f"EMAIL_HOST_PASSWORD=''\n\n")
+            for key in ['EMAIL_HOST', 'EMAIL_USE_TLS', 'EMAIL_PORT', 'EMAIL_USE_SSL', 'EMAIL_HOST_USER', 'EMAIL_HOST_PASSWORD']:
+                self.env.setdefault(key, '', section="SMTP configuration")
 
         if self.smtp:
-            smtpBackend = ast_comments.parse(EMAIL_BACKEND).body[0]
-            smtpHost = ast_comments.parse(EMAIL_HOST).body[0]
-            smtpUseTls = ast_comments.parse(EMAIL_USE_TLS).body[0]
-            smtpPort = ast_comments.parse(EMAIL_PORT).body[0]
-            smtpUseSsl = ast_comments.parse(EMAIL_USE_SSL).body[0]
-            smtpUser = ast_comments.parse(EMAIL_HOST_USER).body[0]
-            smtpPassword = ast_comments.parse(EMAIL_HOST_PASSWORD).body[0]
+            smtpBackend = literalCache.node(EMAIL_BACKEND)
+            smtpHost = literalCache.node(EMAIL_HOST)
+            smtpUseTls = literalCache.node(EMAIL_USE_TLS)
+            smtpPort = literalCache.node(EMAIL_PORT)
+            smtpUseSsl = literalCache.node(EMAIL_USE_SSL)
+            smtpUser = literalCache.node(EMAIL_HOST_USER)
+            smtpPassword = literalCache.node(EMAIL_HOST_PASSWORD)
 
             add_inside_env()
 
             nodesToAdd = [smtpBackend, smtpHost, smtpPort, smtpUser,
                           smtpPassword, smtpUseTls, smtpUseSsl]
 
-            self.root.body.extend(nodesToAdd)
+            self.rewriter.append(nodesToAdd)
             self.log_info("Added SMTP configuration.")
 
     def _add_comments(self):
-        """this method will iterate over 'SETTINGS_COMMENTS' and add the 2nd element of each tuple (which is a comment) above the corrispoding setting in the settings.py file."""
+        """this method will add the 2nd element of each tuple in 'SETTINGS_COMMENTS' (which is a comment) above the corrispoding setting in the settings.py file."""
 
-        for node in ast_comments.walk(self.root):
-            if isinstance(node, ast_comments.Assign):
-                for comment in SETTINGS_COMMENTS:
+        self.rewriter.add_comments(SETTINGS_COMMENTS)
+        self.log_info("Added comments in settings.py")
 
-                    settingName, commentText = comment
-                    if node.targets[0].id == settingName:
-                        # Create an ast object for the comment
+    def _add_app(self):
+        """
+        Render the 'home' app, like 'manage.py startapp home' would, straight into 'apps/home'.
 
-                        comment_node = ast_comments.Comment(
-                            value=commentText, inline=False)
+        An existing 'apps/home' counts as applied, even without a manifest recording it, like in
+        the projects generated before the manifest existed: its files may have been edited since.
+        """
+        if os.path.isdir(os.path.join(self.projectRoot, 'apps/home')):
+            self.log_info("'home' app already exists, skipped it.")
+            return
 
-                        index = self.root.body.index(node)
-                        self.root.body.insert(index, comment_node)
+        self.scaffold.add_template('app', 'home', 'apps/home')
 
-        self.log_info("Added comments in settings.py")
+    def _add_app_files(self) -> None:
+        """
+        Add the files of the options to the 'home' app and route their URLconfs from the project's urls.py.
 
-    def _add_app(self):
-        command = f"python manage.py startapp home"
-        subprocess.run(command, shell=True, check=True)
-        self.log_info("Created 'home' app.")
+        With '--jinja2' the app gets the Jinja2 environment and the template benchmark view, routed at
+        '/benchmark/templates/', with '--assets' the 'buildassets' command and with '--asgi' the async
+        views, routed at '/async/', and the project a 'gunicorn.conf.py'. Without them nothing is added.
+        """
+        # (prefix, URLconf, what it serves, at which URL)
+        routes = []
+        if self.jinja2:
+            self.scaffold.add_tree(os.path.join(
+                APP_FILES_DIR, 'home_jinja2'), 'apps/home')
+            self.scaffold.add_dir('apps/jinja2')
+            routes.append(
+                ('', 'apps.home.urls', "the template benchmark", '/benchmark/templates/'))
+        if self.assets:
+            self.scaffold.add_tree(os.path.join(
+                APP_FILES_DIR, 'home_assets'), 'apps/home')
+        if self.asgi:
+            self.scaffold.add_tree(os.path.join(
+                APP_FILES_DIR, 'home_asgi'), 'apps/home')
+            # The project's package is the directory of the settings, e.g. 'root'
+            projectPackage = os.path.basename(os.path.dirname(
+                os.path.abspath(self.settingsPath)))
+            self.scaffold.add_tree(os.path.join(APP_FILES_DIR, 'project_asgi'), '.',
+                                   {'project_name': projectPackage})
+            routes.append(
+                ('async/', 'apps.home.async_urls', "the async views", '/async/'))
+
+        if not routes:
+            return
+
+        urlsPath = os.path.join(os.path.dirname(
+            os.path.normpath(self.settingsPath)), 'urls.py')
+        try:
+            with open(urlsPath, 'r') as f:
+                urls = f.read()
+        except OSError:
+            urls = ''
+
+        changed = False
+        for prefix, module, description, url in routes:
+            if module in urls:
+                continue
+
+            included = include_urls(urls, prefix, module)
+            if included is None:
+                self.log_warning(
+                    f"Couldn't route '{module}' in urls.py, add 'path(\"{prefix}\", include(\"{module}\"))' to serve {description}.")
+            else:
+                urls, changed = included, True
+                self.log_info(f"Added {description} at '{url}'.")
+
+        if changed:
+            self.scaffold.add_file(os.path.relpath(urlsPath, self.projectRoot), urls)
+
+    def transforms(self) -> list:
+        """
+        Return the transforms of 'edit()', in order, as '(name, step, reads, writes, options it depends on)'.
 
-        shutil.move("home", "apps/home")
+        'reads' and 'writes' are the resources the 'StepScheduler' orders the steps by, 'options'
+        the attributes whose values the 'TransformManifest' keys each step on.
+        """
+        return [('_add_imports', self._add_imports, [], ['settings'], []),
+                ('_add_base_dir', self._add_base_dir, [], ['settings'], []),
+                ('_add_root_dir', self._add_root_dir, [], ['settings'], []),
+                ('_add_env', self._add_env, [], ['settings'], []),
+                ('_add_secret_key', self._add_secret_key, [], ['settings', 'env'], []),
+                ('_add_debug', self._add_debug, [], ['settings', 'env'], []),
+                ('_add_assets_root', self._add_assets_root, [], ['settings', 'env'], []),
+                ('_add_allowed_hosts', self._add_allowed_hosts, [], ['settings'], []),
+                ('_add_csrf_trusted', self._add_csrf_trusted, [], ['settings', 'env'], []),
+                ('_add_installed_apps', self._add_installed_apps, [], ['settings'], ['htmx']),
+                ('_add_middleware', self._add_middleware, [], ['settings'], ['htmx', 'assets']),
+                ('_add_template_dir', self._add_template_dir, [], ['settings'], []),
+                ('_add_templates', self._add_templates, [], ['settings'], ['jinja2']),
+                ('_add_asgi_application', self._add_asgi_application, [], ['settings'], ['asgi']),
+                ('_reserve_database_env', self._reserve_database_env, [], ['env'], ['dbType']),
+                ('_add_static_root', self._add_static_root, [], ['settings'], []),
+                ('_add_static_files_dirs', self._add_static_files_dirs, [], ['settings'], []),
+                ('_add_storages', self._add_storages, [], ['settings'], ['assets']),
+                ('_add_smtp', self._add_smtp, [], ['settings', 'env'], ['smtp']),
+                ('_add_app', self._add_app, [], ['scaffold'], []),
+                ('_add_app_files', self._add_app_files, [], ['scaffold'], ['jinja2', 'assets', 'asgi']),
+                ('_add_comments', self._add_comments, [], ['settings'], []),
+                ('setup_extra_dirs', self._setup_extra_dirs, [], ['scaffold'], []),
+                # Join the cache provisioning, then the database one, the containers start at the same time
+                ('_add_cache', self._add_cache, ['cache'], ['settings', 'env'], ['cache']),
+                # Join the database provisioning, it decides the DATABASES setting and the credentials
+                ('_add_database', self._add_database, ['database'], ['settings', 'env'], ['dbType', 'databaseDict', 'dbPooling'])]
+
+    def module_steps(self) -> list:
+        """Return the settings transforms of 'transforms()', in order, as they run on each module of a settings package."""
+        return [SETTINGS_JOIN_STEPS.get(name, name)
+                for name, _, _, writes, _ in self.transforms() if 'settings' in writes]
 
     # Start:
     def edit(self):
         """    
         Edit the settings.py file by performing various modifications and formatting.
+        The '_add_*' steps only register rules on a 'SettingsRewriter', which applies them
+        all in a single pass over the module body before the file is saved.
         This method performs the following operations:
 
         1. Parse the settings.py file.
@@ -525,52 +686,321 @@ class EditSettings(Logger):
         11. Add the INSTALLED_APPS constant to the settings.py
         12. Add the MIDDLEWARE constant to the settings.py
         13. Add the TEMPLATE_DIR constant to the settings.py
-        14. Add the TEMPLATES constant to the settings.py
+        14. Add the TEMPLATE_LOADERS and TEMPLATES constants to the settings.py, with the cached loader outside DEBUG,
+            and ASGI_APPLICATION with '--asgi'
         15. Add the DATABASES constant to the settings.py
         16. Add the STATIC_ROOT constant to the settings.py
-        17. Add the STATICFILES_DIRS constant to the settings.py
-        18. Save the settings.py file.
-        20. Format the settings.py file with yapf.
+        17. Add the STATICFILES_DIRS constant to the settings.py, and STORAGES with '--assets'
+        18. Unparse the settings, add blank lines and format them with yapf in memory.
+        19. Save the settings.py file with a single write.
+
+        The steps are declared with the resources they read and write ('settings', 'env',
+        'scaffold', 'database', ...) and run by a 'StepScheduler': steps on different resources
+        run at the same time, steps on the same one keep the order above. Each step runs in a
+        'tracer' span, recorded when tracing is enabled, and the critical path is logged.
+
+        What each transform produced is recorded in a 'TransformManifest' in the project root.
+        On a re-run the transforms still applied are skipped, and if nothing changed since the
+        last run the files aren't even parsed.
+
+        If 'settingsPath' is a settings package, 'edit_package()' edits its modules instead.
 
         Returns:
             None
         """
+        if os.path.isdir(self.settingsPath):
+            return self.edit_package()
+
+        manifest = TransformManifest(os.path.join(
+            self.projectRoot, MANIFEST_FILE_NAME))
+
+        transforms = self.transforms()
+
+        inputs = {name: manifest.inputs_hash(name, {option: getattr(self, option) for option in options})
+                  for name, _, _, _, options in transforms}
+        outputFiles = [self.settingsPath, self.env.path]
+
+        if manifest.is_up_to_date(inputs, outputFiles, self.projectRoot):
+            self.log_info("Every transform is already applied, nothing to do.")
+            return
+
+        with tracer.span('parse_file'):
+            self._parse_settings()
+
+        statementHashes = {node_hash(node) for node in self.root.body}
+        applied = [name for name in inputs
+                   if manifest.is_applied(name, inputs[name], statementHashes, self.env, self.projectRoot)]
+        if applied:
+            self.log_info(
+                f"Skipped the transforms already applied: {', '.join(applied)}.")
+
+        # The database container takes the longest, start it first
+        self.provisioning = None
+        if '_add_database' not in applied:
+            self._start_database()
+        if '_add_cache' not in applied:
+            self._start_cache()
+        self.scaffold = Scaffold(self.projectRoot)
+
+        scheduler = StepScheduler()
+        for name, step, reads, writes, _ in transforms:
+            if name not in applied:
+                scheduler.add(name, self._recorded(manifest, name, inputs[name], step, writes),
+                              reads=reads, writes=writes, category='database' if 'database' in reads else 'step')
+
+        # Write the 'home' app and the extra directories in one pass
+        scheduler.add('scaffold.write', self._write_scaffold,
+                      writes=['scaffold'])
+
+        # Apply all the rules above in a single pass over the settings
+        scheduler.add('rewriter.commit', self._commit_settings,
+                      writes=['settings'])
 
-        # Parse the settings.py
+        # Save file and make other edits after it
+        scheduler.add('unparse_and_save_file', self._save_settings,
+                      reads=['settings'], writes=['settings.py'])
+
+        # Write all the collected '.env' keys at once
+        scheduler.add('env.flush', self._flush_env,
+                      reads=['env'], writes=['.env'])
+
+        try:
+            scheduler.run()
+        finally:
+            for provisioning in (self.provisioning, self.cacheProvisioning):
+                if provisioning is not None:
+                    provisioning.cancel()
+
+        manifest.save(outputFiles)
+
+        self.scheduler = scheduler
+        self.log_info(f"Critical path: {scheduler.format_critical_path()}.")
+
+    def edit_package(self) -> None:
+        """
+        Edit every module of the settings package at 'settingsPath', like 'edit()' edits a settings.py.
+
+        'SettingsPackage.route()' decides which transforms run on which module, so a setting
+        is changed where it's assigned and new settings go to the base module. The modules
+        are parsed, transformed and formatted at the same time on a process pool, then written
+        together: if any module fails, none of them changes.
+
+        The database is joined before the modules are edited, as the DATABASES setting depends
+        on it. The manifest only lets an unchanged project skip the whole run, every module
+        is edited again otherwise.
+        """
+        package = SettingsPackage(self.settingsPath)
+        manifest = TransformManifest(os.path.join(
+            self.projectRoot, MANIFEST_FILE_NAME))
+
+        options = {option: getattr(self, option)
+                   for option in ['htmx', 'smtp', 'dbType', 'databaseDict', 'dbPooling', 'cache', 'jinja2', 'assets', 'asgi']}
+        options['modules'] = [os.path.basename(module)
+                              for module in package.modules]
+        inputsHash = manifest.inputs_hash('edit_package', options)
+        outputFiles = package.modules + [self.env.path]
+
+        if manifest.is_up_to_date({'edit_package': inputsHash}, outputFiles, self.projectRoot):
+            self.log_info("Every transform is already applied, nothing to do.")
+            return
+
+        self._start_database()
+        self._start_cache()
+        self.scaffold = Scaffold(self.projectRoot)
+
+        scheduler = StepScheduler()
+        scheduler.add('_add_app', self._add_app, writes=['scaffold'])
+        scheduler.add('_add_app_files', self._add_app_files,
+                      writes=['scaffold'])
+        scheduler.add('setup_extra_dirs', self._setup_extra_dirs,
+                      writes=['scaffold'])
+        scheduler.add('scaffold.write', self._write_scaffold,
+                      writes=['scaffold'])
+        scheduler.add('_reserve_database_env', self._reserve_database_env,
+                      writes=['env'])
+        scheduler.add('_join_cache', self._join_cache,
+                      reads=['cache'], writes=['env'], category='database')
+        scheduler.add('_join_database', self._join_database,
+                      reads=['database'], writes=['env'], category='database')
+        scheduler.add('edit_modules', lambda: self._edit_modules(package),
+                      writes=['env', 'settings.py'])
+        scheduler.add('env.flush', self._flush_env,
+                      reads=['env'], writes=['.env'])
+
+        try:
+            scheduler.run()
+        finally:
+            for provisioning in (self.provisioning, self.cacheProvisioning):
+                if provisioning is not None:
+                    provisioning.cancel()
+
+        # A single entry, the steps a previous settings.py run recorded don't apply anymore
+        manifest.steps = {}
+        manifest.record('edit_package', inputsHash,
+                        paths=list(self.scaffold.files) + self.scaffold.dirs)
+        manifest.save(outputFiles)
+
+        self.scheduler = scheduler
+        self.log_info(f"Critical path: {scheduler.format_critical_path()}.")
+
+    def _edit_modules(self, package: SettingsPackage) -> None:
+        jobs = [{'projectName': self.projectName, 'path': module, 'steps': steps, 'dbType': self.dbType,
+                 'databaseReady': self.databaseReady, 'pooler': self.pooler, 'htmx': 'true' if self.htmx else 'false',
+                 'smtp': 'true' if self.smtp else 'false', 'projectRoot': self.projectRoot,
+                 'logFileName': self.logFile, 'logLevel': self.logLevel, 'patch': self.patch,
+                 'dbPooling': self.dbPooling, 'cache': self.cache, 'cacheReady': self.cacheReady, 'jinja2': self.jinja2,
+                 'assets': self.assets, 'asgi': self.asgi}
+                for module, steps in package.route(self.module_steps()).items()]
+
+        with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as executor:
+            results = list(executor.map(edit_settings_module, jobs))
+
+        # In module order, the base module first, so '.env' is the same whatever finished first.
+        # Every module reads the same key, so the first module setting it wins, e.g. the SECRET_KEY of 'base.py'.
+        contents = {}
+        merged = set()
+        for result in results:
+            self.env.merge([entry for entry in result['env']
+                           if entry[0] not in merged])
+            merged.update(entry[0] for entry in result['env'])
+            if result['content'] is not None:
+                contents[result['path']] = result['content']
+
+        with tracer.span('write', 'output'):
+            atomic_write_many(contents)
+
+        for result in results:
+            moduleName = os.path.basename(result['path'])
+            if result['content'] is None:
+                self.log_info(f"'{moduleName}' is already up to date.")
+            else:
+                self.log_info(
+                    f"'{moduleName}' correctly edited and formatted, {len(result['content'].encode())} bytes written.")
+
+    def transform_module(self, steps: list) -> Union[str, None]:
+        """
+        Parse 'settingsPath', run 'steps' on it and return the formatted content without writing it.
+
+        Returns:
+            Union[str, None]: The new content, or None if the steps don't change the module.
+        """
+        self._parse_settings()
+        for stepName in steps:
+            getattr(self, stepName)()
+
+        if not self.rewriter.changed:
+            return None
+
+        if self.patch:
+            content = self.patch_content()
+        else:
+            self.rewriter.commit()
+            content = self.format_file(
+                self.add_blank_lines(self.unparse_file()))
+
+        return None if content == self.source else content
+
+    def _recorded(self, manifest: TransformManifest, name: str, inputsHash: str, step, writes: list):
+        """Wrap 'step' so what it adds to the resources it writes is recorded in 'manifest'."""
+        def run() -> None:
+            registered = len(self.rewriter.registered)
+            envKeys = len(self.env.history)
+            files, dirs = len(self.scaffold.files), len(self.scaffold.dirs)
+
+            step()
+
+            # Only the resources the step writes: no other step uses them in the meantime.
+            manifest.record(name, inputsHash,
+                            nodes=self.rewriter.registered[registered:] if 'settings' in writes else [],
+                            envKeys=self.env.history[envKeys:] if 'env' in writes else [],
+                            paths=list(self.scaffold.files)[files:] + self.scaffold.dirs[dirs:] if 'scaffold' in writes else [])
+        return run
+
+    def _parse_settings(self) -> None:
+        """Parse the settings.py and index its top-level settings."""
         self.root = self.parse_file()
+        self.rewriter = SettingsRewriter(self.root)
 
-        # In order:
-        self._add_imports()
-        self._add_base_dir()
-        self._add_root_dir()
-        self._add_env()
-        self._add_secret_key()
-        self._add_debug()
-        self._add_assets_root()
-        self._add_allowed_hosts()
-        self._add_csrf_trusted()
-        self._add_installed_apps()
-        self._add_middleware()
-        self._add_template_dir()
-        self._add_templates()
-        self._add_database()
-        self._add_static_root()
-        self._add_static_files_dirs()
-        self._add_smtp()
-        self._add_app()
-
-        self._add_comments()
-
-        setup_extra_dirs(self)
+    def _commit_settings(self) -> None:
+        # In patch mode the rules are applied to the source when it's saved
+        if self.rewriter.changed and not self.patch:
+            self.rewriter.commit()
+
+    def _save_settings(self) -> None:
+        if self.rewriter.changed:
+            self.unparse_and_save_file()
+        else:
+            self.log_info("'settings.py' is already up to date.")
+
+    def _setup_extra_dirs(self) -> None:
+        setup_extra_dirs(self, self.projectRoot, self.scaffold)
+
+    def _write_scaffold(self) -> None:
+        addsApp = any(path.startswith('apps/home') for path in self.scaffold.files)
+        if self.scaffold.write():
+            if addsApp:
+                self.log_info("Created 'home' app.")
+            self.log_info("Created necessary directories and files.")
+
+    def _flush_env(self) -> None:
+        self.env.flush()
+        self.log_info("'.env' correctly saved.")
 
-        # Save file and make other edits after it
-        self.unparse_and_save_file()
 
-        self.add_blank_lines()
-        self.format_file()
+def edit_settings_module(job: dict) -> dict:
+    """
+    Run the steps of one settings package module in a worker process of 'EditSettings.edit_package()'.
+
+    Args:
+        job (dict): The editor's options, the module 'path', its 'steps', 'databaseReady', 'pooler' and 'cacheReady'.
 
+    Returns:
+        dict: The module 'path', its new 'content' (None if unchanged) and the 'env' keys it set, from 'EnvFile.export()'.
+    """
+    editor = EditSettings(job['projectName'], job['path'], job['dbType'], {'default': ''}, job['htmx'], job['smtp'],
+                          job['projectRoot'], job['logFileName'], job['logLevel'], job['patch'], job['dbPooling'], job['cache'], job['jinja2'], job['assets'], job['asgi'])
+    editor.databaseReady = job['databaseReady']
+    editor.pooler = job['pooler']
+    editor.cacheReady = job['cacheReady']
+    editor.packageModule = True
 
-def setup_extra_dirs(logger: Logger) -> None:
+    try:
+        content = editor.transform_module(job['steps'])
+        return {'path': job['path'], 'content': content, 'env': editor.env.export(editor.env.history)}
+    finally:
+        editor.close()
+
+
+def include_urls(urls: str, prefix: str, module: str) -> Union[str, None]:
+    """
+    Route 'prefix' to the URLconf 'module' in the content of the urls.py 'startproject' creates.
+
+    Returns:
+        Union[str, None]: The new content, None if it doesn't look like the one 'startproject' creates.
+    """
+    # Either quote style, and 'include' may already be imported by a previous route
+    urls, imports = re.subn(r'^from django\.urls import (include, )?path$', 'from django.urls import include, path',
+                            urls, count=1, flags=re.MULTILINE)
+    urls, routes = re.subn(r'^( +)path\((["\'])admin/\2, admin\.site\.urls\),$',
+                           lambda match: f"{match[0]}\n{match[1]}path({match[2]}{prefix}{match[2]}, include({match[2]}{module}{match[2]})),",
+                           urls, count=1, flags=re.MULTILINE)
+
+    return urls if imports and routes else None
+
+
+def add_middleware(middlewareNode: ast_comments.Assign, middleware: str, after: str) -> None:
+    """Put 'middleware' in the MIDDLEWARE list of 'middlewareNode' right after 'after', or first without it, unless it's there."""
+    elements = middlewareNode.value.elts
+    values = [element.value if isinstance(element, ast_comments.Constant) else None
+              for element in elements]
+    if middleware in values:
+        return
+
+    position = values.index(after) + 1 if after in values else 0
+    elements.insert(position, ast_comments.Constant(value=middleware))
+
+
+def setup_extra_dirs(logger: Logger, projectRoot: str = '.', scaffold: Scaffold = None) -> None:
     """
     Create necessary directories and files for the project's static, assets and templates.
 
@@ -586,116 +1016,176 @@ def setup_extra_dirs(logger: Logger) -> None:
 
     If any of these directories or files already exist, they will not be recreated.
 
+    Args:
+        logger (Logger): Logger instance
+        projectRoot (str): Directory of the project. Default is the current directory.
+        scaffold (Scaffold): If given, the directories and files are only added to it and
+            written by the caller with 'scaffold.write()'.
+
     Returns:
         None
     """
 
+    ownScaffold = scaffold is None
+    if ownScaffold:
+        scaffold = Scaffold(projectRoot)
+
     # Static root in settings.py
-    os.makedirs('staticfiles',  exist_ok=True)
+    scaffold.add_dir('staticfiles')
 
     # Templates dir
-    os.makedirs('apps/templates/layouts', exist_ok=True)
+    scaffold.add_dir('apps/templates/layouts')
 
-    # create a base.html file
-    with open('apps/templates/layouts/base.html', 'w') as f:
-        f.write("<!DOCTYPE html>\n")
+    # create a base.html file, unless there is one already: it may have been edited since
+    if not os.path.exists(os.path.join(projectRoot, 'apps/templates/layouts/base.html')):
+        scaffold.add_file('apps/templates/layouts/base.html', "<!DOCTYPE html>\n")
 
     # Assets dirs
-    os.makedirs('apps/static/assets', exist_ok=True)
-    os.makedirs('apps/static/assets/css',  exist_ok=True)
-    os.makedirs('apps/static/assets/js',  exist_ok=True)
-    os.makedirs('apps/static/assets/img',  exist_ok=True)
+    scaffold.add_dir('apps/static/assets')
+    scaffold.add_dir('apps/static/assets/css')
+    scaffold.add_dir('apps/static/assets/js')
+    scaffold.add_dir('apps/static/assets/img')
 
-    logger.log_info("Created necessary directories and files.")
+    if ownScaffold:
+        scaffold.write()
+        logger.log_info("Created necessary directories and files.")
 
 
-def setup_mysql(projectName: str, logger: Logger) -> bool:
+def setup_mysql(projectName: str, logger: Logger, env: EnvFile, provisioning: DatabaseProvisioning = None) -> bool:
     """
     This function installs MySQL, sets up MySQL, creates a user with privileges, creates a database, and saves the credentials to the '.env' file. 
 
     Args:
         projectName (str): Project name
         logger (Logger): Logger instance
+        env (EnvFile): The '.env' file where to save the credentials
+        provisioning (DatabaseProvisioning): An already started provisioning to join, instead of running the 'database' script here.
 
     Returns:
         bool: True if docker started, user created with grant and saved credentials in the 
     """
     try:
-        envVariables = {
-            'CONTAINER_NAME': f"{projectName}",
-            'DATABASE_TYPE': "mysql",
-            'MYSQL_HOST': f"{MYSQL_HOST}",
-            'MYSQL_PORT': f"{MYSQL_PORT}",
-            'MYSQL_USER': f"{MYSQL_USER}",
-            'MYSQL_PASSWORD': f"{MYSQL_PASSWORD}",
-            'MYSQL_ROOT_PASSWORD': f"{MYSQL_ROOT_PASSWORD}"
-        }
-
-        currentDir = os.path.dirname(__file__)
-        command = f" {currentDir}/database"
-
-        subprocess.run(
-            command, shell=True, check=True, env=envVariables)
-
-        with open('.env', 'a') as env:
-            env.write("# MySQL credentials:\n")
-            env.write(f"MYSQL_NAME='{projectName}'\n")
-            env.write(f"MYSQL_HOST='{MYSQL_HOST}'\n")
-            env.write(f"MYSQL_PORT='{MYSQL_PORT}'\n")
-            env.write(f"MYSQL_USER='{MYSQL_USER}'\n")
-            env.write(f"MYSQL_PASSWORD='{MYSQL_PASSWORD}'\n")
-            env.write(f"MYSQL_ROOT_PASSWORD='{MYSQL_ROOT_PASSWORD}'\n\n")
-            logger.log_info("Added MySQL credentials to '.env'.")
+        if provisioning is None:
+            provisioning = DatabaseProvisioning("mysql", projectName).start()
+        with tracer.span('provisioning.wait', 'database'):
+            provisioning.wait()
+        if provisioning.reused:
+            logger.log_info(
+                f"Reusing the existing MySQL container '{projectName}'.")
+
+        credentials = provisioning.credentials
+        wait_until_ready("mysql", credentials['host'], credentials['port'], logger)
+
+        section = "MySQL credentials"
+        env.set('MYSQL_NAME', projectName, section=section)
+        env.set('MYSQL_HOST', credentials['host'], section=section)
+        env.set('MYSQL_PORT', credentials['port'], section=section)
+        env.set('MYSQL_USER', credentials['user'], section=section)
+        env.set('MYSQL_PASSWORD', credentials['password'], section=section)
+        env.set('MYSQL_ROOT_PASSWORD',
+                credentials['rootPassword'], section=section)
+        logger.log_info("Added MySQL credentials to '.env'.")
 
         return True
 
     except Exception as e:
-        print(f"{e=}")
+        logger.log_error(f"MySQL provisioning failed: {e!r}")
         return False
 
 
-def setup_postgre(projectName: str, logger: Logger) -> bool:
+def setup_postgre(projectName: str, logger: Logger, env: EnvFile, provisioning: DatabaseProvisioning = None) -> bool:
     """
-    This function installs MySQL, sets up MySQL, creates a user with privileges, creates a database, and saves the credentials to the '.env' file. 
+    This function installs PostgreSQL, sets up PostgreSQL, creates a user with privileges, creates a database, and saves the credentials to the '.env' file. 
 
     Args:
         projectName (str): Project name
         logger (Logger): Logger instance
+        env (EnvFile): The '.env' file where to save the credentials
+        provisioning (DatabaseProvisioning): An already started provisioning to join, instead of running the 'database' script here.
+
+    With a PgBouncer container in front of the database, the project connects to it through
+    'POSTGRESQL_PORT' and 'POSTGRESQL_DIRECT_PORT' is the database's own port.
 
     Returns:
         bool: True if docker started, user created with grant and saved credentials in the 
     """
     try:
-        envVariables = {
-            'CONTAINER_NAME': f"{projectName}",
-            'DATABASE_TYPE': "postgre",
-            'POSTGRESQL_HOST': f"{POSTGRESQL_HOST}",
-            'POSTGRESQL_PORT': f"{POSTGRESQL_PORT}",
-            'POSTGRESQL_USER': f"{POSTGRESQL_USER}",
-            'POSTGRESQL_PASSWORD': f"{POSTGRESQL_PASSWORD}",
-            'POSTGRESQL_ROOT_PASSWORD': f"{POSTGRESQL_ROOT_PASSWORD}"
-        }
-
-        currentDir = os.path.dirname(__file__)
-        command = f" {currentDir}/database"
-        subprocess.run(
-            command, shell=True, check=True, start_new_session=True, env=envVariables)
-
-        with open('.env', 'a') as env:
-            env.write("# PostgreSQL credentials:\n")
-            env.write(f"POSTGRESQL_NAME='{projectName}'\n")
-            env.write(f"POSTGRESQL_HOST='{POSTGRESQL_HOST}'\n")
-            env.write(f"POSTGRESQL_PORT='{POSTGRESQL_PORT}'\n")
-            env.write(f"POSTGRESQL_USER='{POSTGRESQL_USER}'\n")
-            env.write(f"POSTGRESQL_PASSWORD='{POSTGRESQL_PASSWORD}'\n")
-            env.write(
-                f"POSTGRESQL_ROOT_PASSWORD='{POSTGRESQL_ROOT_PASSWORD}'\n\n")
-            logger.log_info("Added PostgreSQL credentials to '.env'.")
+        if provisioning is None:
+            provisioning = DatabaseProvisioning("postgre", projectName).start()
+        with tracer.span('provisioning.wait', 'database'):
+            provisioning.wait()
+        if provisioning.reused:
+            logger.log_info(
+                f"Reusing the existing PostgreSQL container '{projectName}'.")
+
+        credentials = provisioning.credentials
+        wait_until_ready("postgre", credentials['host'], credentials['port'], logger)
+
+        port = credentials['port']
+        if provisioning.pooler is not None:
+            port = credentials['poolerPort']
+            wait_until_ready("postgre", credentials['host'], port, logger)
+
+        section = "PostgreSQL credentials"
+        env.set('POSTGRESQL_NAME', projectName, section=section)
+        env.set('POSTGRESQL_HOST', credentials['host'], section=section)
+        env.set('POSTGRESQL_PORT', port, section=section)
+        if provisioning.pooler is not None:
+            env.set('POSTGRESQL_DIRECT_PORT',
+                    credentials['port'], section=section)
+        env.set('POSTGRESQL_USER', credentials['user'], section=section)
+        env.set('POSTGRESQL_PASSWORD', credentials['password'], section=section)
+        env.set('POSTGRESQL_ROOT_PASSWORD',
+                credentials['rootPassword'], section=section)
+        logger.log_info("Added PostgreSQL credentials to '.env'.")
 
         return True
 
     except Exception as e:
-        print(f"{e=}")
+        logger.log_error(f"PostgreSQL provisioning failed: {e!r}")
+        return False
+
+
+def setup_cache(cacheType: str, projectName: str, logger: Logger, env: EnvFile, provisioning: DatabaseProvisioning = None) -> bool:
+    """
+    Join the provisioning of the Redis or Memcached container and save where it listens to the '.env' file.
+
+    Args:
+        cacheType (str): 'redis' or 'memcached'.
+        projectName (str): Project name
+        logger (Logger): Logger instance
+        env (EnvFile): The '.env' file where to save the connection details
+        provisioning (DatabaseProvisioning): An already started provisioning to join, instead of running the 'database' script here.
+
+    Returns:
+        bool: True if the cache accepts connections and its details are in '.env'.
+    """
+    cacheName = {'redis': 'Redis', 'memcached': 'Memcached'}[cacheType]
+
+    try:
+        if provisioning is None:
+            provisioning = DatabaseProvisioning(cacheType, projectName).start()
+        with tracer.span('provisioning.wait', 'database'):
+            provisioning.wait()
+        if provisioning.reused:
+            logger.log_info(
+                f"Reusing the existing {cacheName} container '{container_name(projectName, cacheType)}'.")
+
+        credentials = provisioning.credentials
+        wait_until_ready(cacheType, credentials['host'], credentials['port'], logger)
+
+        if cacheType == "redis":
+            env.set('REDIS_URL', f"redis://:{credentials['password']}@{credentials['host']}:{credentials['port']}/0",
+                    section=cacheName)
+        else:
+            env.set('MEMCACHED_LOCATION', f"{credentials['host']}:{credentials['port']}",
+                    section=cacheName)
+        logger.log_info(f"Added {cacheName} connection details to '.env'.")
+
+        return True
+
+    except Exception as e:
+        logger.log_error(f"{cacheName} provisioning failed: {e!r}")
         return False
 
 
@@ -706,6 +1196,38 @@ if __name__ == "__main__":
     databaseDict = json.loads(sys.argv[4])
     htmx = sys.argv[5]
     smtp = sys.argv[6]
-
-    EditSettings(projectName=projectName, settingsPath=settingsPath, dbType=dbType,
-                 databaseDict=databaseDict, htmx=htmx, smtp=smtp).edit()
+    trace = len(sys.argv) > 7 and sys.argv[7] == "true"
+    patch = len(sys.argv) > 8 and sys.argv[8] == "true"
+    # 'false', 'app' or 'pgbouncer'
+    dbPooling = sys.argv[9] if len(sys.argv) > 9 and sys.argv[9] != "false" else ''
+    cache = sys.argv[10] if len(sys.argv) > 10 and sys.argv[10] != "false" else ''
+    jinja2 = len(sys.argv) > 11 and sys.argv[11] == "true"
+    assets = len(sys.argv) > 12 and sys.argv[12] == "true"
+    asgi = len(sys.argv) > 13 and sys.argv[13] == "true"
+
+    if trace:
+        tracer.enable()
+
+    # A settings package ('root/settings/base.py', ...) in place of 'root/settings.py'
+    if not os.path.exists(settingsPath) and os.path.isdir(os.path.splitext(settingsPath)[0]):
+        settingsPath = os.path.splitext(settingsPath)[0]
+
+    editSettings = EditSettings(projectName=projectName, settingsPath=settingsPath, dbType=dbType,
+                                databaseDict=databaseDict, htmx=htmx, smtp=smtp, patch=patch, dbPooling=dbPooling, cache=cache, jinja2=jinja2, assets=assets, asgi=asgi)
+
+    # Create the Django project in-process if it isn't there yet, like 'django-admin startproject root .'
+    if not os.path.exists(settingsPath):
+        try:
+            with tracer.span('start_project'):
+                start_project(os.path.basename(os.path.dirname(settingsPath)),
+                              os.path.dirname(os.path.dirname(os.path.abspath(settingsPath))))
+            editSettings.log_info("Django project created successfully.")
+        except Exception as e:
+            editSettings.log_error(f"Failed to create the Django project: {e}")
+            sys.exit(1)
+
+    editSettings.edit()
+
+    if trace:
+        tracer.save(TRACE_FILE_NAME)
+        editSettings.log_info(f"Trace saved in '{TRACE_FILE_NAME}'.")
@@ -0,0 +1,71 @@
+import ast
+import os
+from const import SETTINGS_BASE_MODULE, SETTINGS_EVERY_MODULE_STEPS, SETTINGS_STEP_ANCHORS
+
+
+def settings_names(path: str) -> set:
+    """Return the names of the top-level settings assigned in the module at 'path'."""
+    with open(path, 'r') as f:
+        module = ast.parse(f.read(), path)
+
+    return {node.targets[0].id for node in module.body
+            if isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name)}
+
+
+class SettingsPackage:
+    def __init__(self, path: str, baseModule: str = SETTINGS_BASE_MODULE):
+        """
+        A settings package, like 'settings/base.py' with 'dev.py', 'prod.py' and 'test.py' next to it.
+
+        The base module holds the shared settings, the other modules import it and override
+        some of them. Without a '<baseModule>.py', '__init__.py' is the base module. The
+        settings each module assigns are read with the standard 'ast' parser, which is much
+        faster than parsing with the comments and is enough to route the steps.
+
+        Args:
+            path (str): The package directory.
+            baseModule (str): Name of the base module. Default is 'SETTINGS_BASE_MODULE'.
+        """
+        self.path = path
+        names = sorted(name for name in os.listdir(path) if name.endswith('.py'))
+
+        if f"{baseModule}.py" in names:
+            self.base = os.path.join(path, f"{baseModule}.py")
+        elif '__init__.py' in names:
+            self.base = os.path.join(path, '__init__.py')
+        else:
+            raise FileNotFoundError(
+                f"'{path}' has neither a '{baseModule}.py' nor an '__init__.py' module.")
+
+        self.modules = [self.base] + [os.path.join(path, name) for name in names
+                                      if name != '__init__.py' and os.path.join(path, name) != self.base]
+        self.settings = {module: settings_names(module) for module in self.modules}
+
+    def route(self, steps: list) -> dict:
+        """
+        Return the steps to run on each module, in the order of 'steps'.
+
+        A step replacing a setting, or inserting next to it, runs on the base module if it assigns
+        that setting, else on the first module that does: e.g. DEBUG is replaced in 'base.py' and
+        the DEBUG = False of 'prod.py' stays. The comments are added to every module. The other
+        steps, like the imports and the SMTP configuration, only run on the base module.
+
+        Returns:
+            dict: Module path -> list of step names, the base module first.
+        """
+        routes = {module: [] for module in self.modules}
+
+        for step in steps:
+            if step in SETTINGS_EVERY_MODULE_STEPS:
+                targets = self.modules
+            elif step in SETTINGS_STEP_ANCHORS:
+                anchor = SETTINGS_STEP_ANCHORS[step]
+                targets = [next((module for module in self.modules if anchor in self.settings[module]),
+                                self.base)]
+            else:
+                targets = [self.base]
+
+            for module in targets:
+                routes[module].append(step)
+
+        return routes
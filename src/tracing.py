@@ -0,0 +1,116 @@
+import contextlib
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from utils import atomic_write
+
+
+def _thread_io() -> tuple:
+    """Return the bytes read and written by the current thread so far, (0, 0) where '/proc' doesn't tell."""
+    try:
+        with open('/proc/thread-self/io', 'rb') as f:
+            fields = dict(line.split(b': ') for line in f.read().splitlines())
+        return int(fields[b'rchar']), int(fields[b'wchar'])
+    except (OSError, KeyError, ValueError):
+        return 0, 0
+
+
+# Reading '/proc' counts as I/O too, measure it once so spans don't include it.
+_IO_PROBE_READ = -(_thread_io()[0] - _thread_io()[0])
+
+
+class Tracer:
+    def __init__(self):
+        """
+        Record timed spans of the bootstrap and export them as a Chrome trace.
+
+        Each span keeps its wall time, the CPU time and the bytes of I/O of the thread running
+        it. The file 'save()' writes opens in chrome://tracing or https://ui.perfetto.dev, with
+        the machine it was recorded on in its metadata so runs can be compared.
+
+        Nothing is recorded until 'enable()' is called, a disabled span costs a function call.
+        """
+        self.enabled = False
+        self.events = []
+        self.threadNames = {}
+        self.lock = threading.Lock()
+        self.start = 0
+
+    def enable(self) -> None:
+        self.enabled = True
+        self.start = time.perf_counter()
+
+    def span(self, name: str, category: str = 'step', **args):
+        """
+        Context manager timing the code inside it.
+
+        Args:
+            name (str): Name of the span, like the step it wraps.
+            category (str): Group of the span in the trace, e.g. 'step', 'output' or 'database'.
+            **args: Extra values shown with the span.
+        """
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._span(name, category, args)
+
+    @contextlib.contextmanager
+    def _span(self, name: str, category: str, args: dict):
+        thread = threading.current_thread()
+        readStart, writtenStart = _thread_io()
+        cpuStart = time.thread_time()
+        wallStart = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            wallEnd = time.perf_counter()
+            cpuEnd = time.thread_time()
+            readEnd, writtenEnd = _thread_io()
+
+            event = {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'pid': os.getpid(),
+                'tid': thread.ident,
+                'ts': (wallStart - self.start) * 1e6,
+                'dur': (wallEnd - wallStart) * 1e6,
+                'tts': cpuStart * 1e6,
+                'tdur': (cpuEnd - cpuStart) * 1e6,
+                'args': {**args,
+                         'cpu_ms': round((cpuEnd - cpuStart) * 1000, 3),
+                         'read_bytes': max(0, readEnd - readStart - _IO_PROBE_READ),
+                         'written_bytes': writtenEnd - writtenStart}
+            }
+
+            with self.lock:
+                self.events.append(event)
+                self.threadNames[thread.ident] = thread.name
+
+    def save(self, path: str) -> None:
+        """Write the recorded spans to 'path' in the Chrome trace event format."""
+        with self.lock:
+            events = list(self.events)
+            threadNames = dict(self.threadNames)
+
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': threadName}}
+                    for tid, threadName in threadNames.items()]
+
+        trace = {
+            'traceEvents': metadata + sorted(events, key=lambda event: event['ts']),
+            'displayTimeUnit': 'ms',
+            'otherData': {
+                'platform': platform.platform(),
+                'machine': platform.machine(),
+                'cpus': os.cpu_count(),
+                'python': sys.version.split()[0],
+            }
+        }
+
+        atomic_write(path, json.dumps(trace, indent=1))
+
+
+tracer = Tracer()
@@ -0,0 +1,89 @@
+import os
+import shutil
+import threading
+
+
+def get_cache_dir() -> str:
+    """Return the directory where django-venv keeps its caches ('$XDG_CACHE_HOME/django-venv')."""
+    cacheHome = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(cacheHome, 'django-venv')
+
+
+def atomic_write(path: str, content, mode: str = 'w', permissions: int = 0o666) -> None:
+    """
+    Write 'content' to 'path' through a temporary file in the same directory, so readers
+    never see a partially written file.
+
+    Args:
+        path (str): The file to write.
+        content (str | bytes): What to write.
+        mode (str): 'w' for text, 'wb' for bytes. Default is 'w'.
+        permissions (int): Permission bits of a new file, before the umask. Default is 0o666.
+            An existing file keeps its own.
+    """
+    tmpPath = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        fd = os.open(tmpPath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, permissions)
+        with os.fdopen(fd, mode) as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if os.path.exists(path):
+            shutil.copymode(path, tmpPath)
+        os.replace(tmpPath, path)
+    except BaseException:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+        raise
+
+
+def atomic_write_many(contents: dict, mode: str = 'w') -> None:
+    """
+    Write several files together: each one goes to a temporary file in its directory first, and
+    they only replace the originals once all of them are written. If replacing one fails, the
+    files already replaced are restored, so a failure leaves every file as it was. A crash of
+    the process in between can still leave some of them replaced.
+
+    Args:
+        contents (dict): Path -> content (str or bytes).
+        mode (str): 'w' for text, 'wb' for bytes. Default is 'w'.
+    """
+    tmpPaths = {}
+    # Path -> link to its previous content, None if it didn't exist
+    backups = {}
+    try:
+        for path, content in contents.items():
+            tmpPaths[path] = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmpPaths[path], mode) as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+
+            if os.path.exists(path):
+                shutil.copymode(path, tmpPaths[path])
+
+        for path, tmpPath in tmpPaths.items():
+            backups[path] = None
+            if os.path.exists(path):
+                backups[path] = f"{tmpPath}.orig"
+                os.link(path, backups[path])
+            os.replace(tmpPath, path)
+
+    except BaseException:
+        for path, backup in backups.items():
+            if backup is None:
+                if not os.path.exists(tmpPaths[path]) and os.path.exists(path):
+                    os.remove(path)
+            elif os.path.exists(backup):
+                os.replace(backup, path)
+
+        for tmpPath in tmpPaths.values():
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+        raise
+
+    for backup in backups.values():
+        if backup is not None:
+            os.remove(backup)
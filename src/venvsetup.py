@@ -0,0 +1,347 @@
+import fcntl
+import json
+import os
+import shutil
+import sys
+import time
+import venv
+from const import BASE_REQUIREMENTS, HTMX_REQUIREMENTS, DATABASE_REQUIREMENTS, POOLING_REQUIREMENTS, CACHE_REQUIREMENTS, \
+    JINJA2_REQUIREMENTS, ASSETS_REQUIREMENTS, ASGI_REQUIREMENTS, GOLDEN_VENVS_MAX_SIZE
+from utils import get_cache_dir, atomic_write
+from wheelhouse import Wheelhouse
+
+# Linux ioctl asking the filesystem (btrfs, xfs, ...) for a copy-on-write clone of a file.
+FICLONE = 0x40049409
+
+# Longest '#!' line the kernel reliably honours, longer ones need a '/bin/sh' trampoline.
+SHEBANG_MAX_LENGTH = 127
+
+GOLDEN_MARKER = 'golden.json'
+
+
+def project_requirements(dbType: str, htmx: bool, dbPooling: bool = False, cache: str = '', jinja2: bool = False,
+                         assets: bool = False, asgi: bool = False) -> list:
+    """
+    Return the dependencies of a generated project.
+
+    Args:
+        dbType (str): 'mysql', 'postgre' or an empty string for SQLite.
+        htmx (bool): Whether the project uses django-htmx.
+        dbPooling (bool): Whether the DATABASES setting uses a connection pool. Default is False.
+        cache (str): The CACHES backend, e.g. 'redis'. Default is '', Django's default cache.
+        jinja2 (bool): Whether TEMPLATES has a Jinja2 backend. Default is False.
+        assets (bool): Whether WhiteNoise serves the static files, built by 'buildassets'. Default is False.
+        asgi (bool): Whether the project is served over ASGI by gunicorn and uvicorn. Default is False.
+    """
+    requirements = list(BASE_REQUIREMENTS)
+    if htmx:
+        requirements += HTMX_REQUIREMENTS
+    requirements += DATABASE_REQUIREMENTS.get(dbType, [])
+    if dbPooling:
+        requirements += POOLING_REQUIREMENTS.get(dbType, [])
+    requirements += CACHE_REQUIREMENTS.get(cache, [])
+    if jinja2:
+        requirements += JINJA2_REQUIREMENTS
+    if assets:
+        requirements += ASSETS_REQUIREMENTS
+    if asgi:
+        requirements += ASGI_REQUIREMENTS
+    return requirements
+
+
+def venv_python(venvPath: str) -> str:
+    return os.path.join(venvPath, 'bin', 'python')
+
+
+def _reflink(source: str, target: str) -> None:
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.remove(target)
+            raise
+
+    # Keep the mtime, '.pyc' files are validated against their source's.
+    shutil.copystat(source, target)
+
+
+class FileCloner:
+    def __init__(self):
+        """
+        Copy files with the cheapest method the filesystem supports.
+
+        A reflink shares the data until either copy is modified. A hard link shares the file
+        itself, so a hardlinked file must be replaced rather than edited in place, which is what
+        pip does on upgrade and uninstall. The first method that fails is dropped for every
+        following file, down to a plain copy.
+        """
+        self.methods = [_reflink, os.link, shutil.copy2]
+
+    def __call__(self, source: str, target: str) -> None:
+        while True:
+            try:
+                return self.methods[0](source, target)
+            except OSError:
+                if len(self.methods) == 1:
+                    raise
+                self.methods.pop(0)
+
+    @property
+    def method(self) -> str:
+        return {_reflink: 'reflink', os.link: 'hardlink', shutil.copy2: 'copy'}[self.methods[0]]
+
+
+def _fix_shebang(content: bytes) -> bytes:
+    """Turn a '#!' line the kernel would truncate into the '/bin/sh' trampoline pip uses for long paths."""
+    if not content.startswith(b'#!'):
+        return content
+
+    firstLine, _, rest = content.partition(b'\n')
+    if len(firstLine) <= SHEBANG_MAX_LENGTH or b' ' in firstLine:
+        return content
+
+    return b"#!/bin/sh\n'''exec' \"" + firstLine[2:] + b"\" \"$0\" \"$@\"\n' '''\n" + rest
+
+
+def _files_containing(directory: str, text: str) -> list:
+    needle = text.encode()
+    found = []
+
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            # '.pyc' files hold their source's path too, but it's marshalled data the import
+            # system fixes up on its own, so they are linked like the rest.
+            if os.path.islink(path) or name.endswith('.pyc'):
+                continue
+            with open(path, 'rb') as f:
+                if needle in f.read():
+                    found.append(os.path.relpath(path, directory))
+
+    return sorted(found)
+
+
+class GoldenVenvs:
+    def __init__(self, cacheDir: str = None, wheelhouse: Wheelhouse = None, maxSize: int = GOLDEN_VENVS_MAX_SIZE):
+        """
+        Pre-built virtual environments, one per dependency set, that new projects get a copy of.
+
+        A golden venv is created and installed from the wheelhouse once. Cloning it links or
+        reflinks every file, and only rewrites the few files holding its own path, like the
+        scripts' shebangs, 'activate' and 'pyvenv.cfg'. Which files those are is found once,
+        when the golden venv is built. The sets are keyed on the resolved versions, so each new
+        release adds one: the least recently used are evicted when the cache grows over 'maxSize' bytes.
+
+        Args:
+            cacheDir (str): Root of the cache. Default is '<get_cache_dir()>/golden-venvs'.
+            wheelhouse (Wheelhouse): The wheel cache golden venvs are installed from. Default is 'Wheelhouse()'.
+            maxSize (int): Size in bytes the cache is trimmed to. Default is 'GOLDEN_VENVS_MAX_SIZE'.
+        """
+        self.cacheDir = cacheDir or os.path.join(get_cache_dir(), 'golden-venvs')
+        self.wheelhouse = wheelhouse or Wheelhouse()
+        self.maxSize = maxSize
+
+    def path(self, requirements: list) -> str:
+        # Same key as the wheels: same requirements, Python version and platform.
+        return os.path.join(self.cacheDir, self.wheelhouse.key(requirements))
+
+    def ensure(self, requirements: list, logger=None) -> str:
+        """
+        Make sure the golden venv of 'requirements' exists, building it if needed.
+
+        Returns:
+            str: The golden venv directory.
+        """
+        goldenDir = self.path(requirements)
+        markerPath = os.path.join(goldenDir, GOLDEN_MARKER)
+
+        if os.path.exists(markerPath):
+            # The marker's mtime is the last use, for the LRU eviction.
+            os.utime(markerPath)
+            return goldenDir
+
+        os.makedirs(self.cacheDir, exist_ok=True)
+        tmpDir = f"{goldenDir}.{os.getpid()}.tmp"
+        shutil.rmtree(tmpDir, ignore_errors=True)
+
+        if logger is not None:
+            logger.log_info(
+                "Building the template virtual environment, this is only done once per dependency set....")
+
+        try:
+            venv.EnvBuilder(with_pip=True).create(tmpDir)
+            self.wheelhouse.install(requirements, venv_python(tmpDir), logger)
+
+            # The venv keeps the path it was built at, clones replace it with theirs.
+            marker = {'path': tmpDir,
+                      'rewrite': _files_containing(tmpDir, tmpDir)}
+            atomic_write(os.path.join(tmpDir, GOLDEN_MARKER),
+                         json.dumps(marker, indent=2))
+
+            try:
+                os.rename(tmpDir, goldenDir)
+            except OSError:
+                # Another run built the same set first, use theirs.
+                shutil.rmtree(tmpDir, ignore_errors=True)
+
+        except BaseException:
+            shutil.rmtree(tmpDir, ignore_errors=True)
+            raise
+
+        self.evict(keep=goldenDir)
+        return goldenDir
+
+    def evict(self, keep: str = None) -> list:
+        """
+        Remove the least recently used golden venvs until the cache fits in 'maxSize', like 'Wheelhouse.evict()'.
+
+        Args:
+            keep (str): A golden venv never to remove, like the one just built.
+
+        Returns:
+            list: The removed directories.
+        """
+        entries = []
+        totalSize = 0
+
+        for name in os.listdir(self.cacheDir):
+            goldenDir = os.path.join(self.cacheDir, name)
+            markerPath = os.path.join(goldenDir, GOLDEN_MARKER)
+            if not os.path.exists(markerPath):
+                continue  # Being built by another run
+
+            size = 0
+            for root, _, files in os.walk(goldenDir):
+                size += sum(os.lstat(os.path.join(root, fileName)).st_size for fileName in files)
+            entries.append((os.stat(markerPath).st_mtime, size, goldenDir))
+            totalSize += size
+
+        removed = []
+        for _, size, goldenDir in sorted(entries):
+            if totalSize <= self.maxSize:
+                break
+            if goldenDir == keep:
+                continue
+
+            shutil.rmtree(goldenDir, ignore_errors=True)
+            totalSize -= size
+            removed.append(goldenDir)
+
+        return removed
+
+    def clone(self, requirements: list, venvPath: str, logger=None) -> str:
+        """
+        Create a virtual environment at 'venvPath' as a copy of the golden venv of 'requirements'.
+
+        Args:
+            requirements (list): Requirement specifiers, e.g. ['Django', 'django-environ'].
+            venvPath (str): Where to create the virtual environment. It must not exist or be empty.
+            logger (Logger): Logger instance. Optional.
+
+        Returns:
+            str: How the files were copied: 'reflink', 'hardlink' or 'copy'.
+        """
+        goldenDir = self.ensure(requirements, logger)
+        with open(os.path.join(goldenDir, GOLDEN_MARKER), 'r') as f:
+            marker = json.load(f)
+
+        if os.path.exists(venvPath) and os.listdir(venvPath):
+            raise FileExistsError(
+                f"'{venvPath}' already exists and is not empty.")
+
+        oldPath = marker['path'].encode()
+        newPath = os.path.abspath(venvPath).encode()
+        rewrite = set(marker['rewrite'])
+        cloner = FileCloner()
+
+        for root, dirs, files in os.walk(goldenDir):
+            relativeDir = os.path.relpath(root, goldenDir)
+            targetDir = os.path.normpath(os.path.join(venvPath, relativeDir))
+            os.makedirs(targetDir, exist_ok=True)
+
+            for name in dirs + files:
+                source = os.path.join(root, name)
+                target = os.path.join(targetDir, name)
+                relativePath = os.path.normpath(
+                    os.path.join(relativeDir, name))
+
+                # 'bin/python' and 'lib64' are symlinks, os.walk lists them but doesn't follow them.
+                if os.path.islink(source):
+                    os.symlink(os.readlink(source), target)
+
+                elif name in dirs or relativePath == GOLDEN_MARKER:
+                    continue
+
+                elif relativePath in rewrite:
+                    with open(source, 'rb') as f:
+                        content = f.read().replace(oldPath, newPath)
+                    with open(target, 'wb') as f:
+                        f.write(_fix_shebang(content))
+                    shutil.copymode(source, target)
+
+                else:
+                    cloner(source, target)
+
+        return cloner.method
+
+
+def create_venv(venvPath: str, dbType: str, htmx: bool, logger, wheelhouse: Wheelhouse = None, clone: bool = False,
+                dbPooling: bool = False, cache: str = '', jinja2: bool = False, assets: bool = False,
+                asgi: bool = False) -> None:
+    """
+    Create the project's virtual environment and install its dependencies from the wheelhouse.
+
+    Args:
+        venvPath (str): Where to create the virtual environment.
+        dbType (str): 'mysql', 'postgre' or an empty string for SQLite.
+        htmx (bool): Whether the project uses django-htmx.
+        logger (Logger): Logger instance
+        wheelhouse (Wheelhouse): The wheel cache to install from. Default is 'Wheelhouse()'.
+        clone (bool): Copy the golden venv with the same dependencies instead. Default is False.
+        dbPooling (bool): Install the connection pool dependencies too. Default is False.
+        cache (str): Install the client of this CACHES backend too. Default is ''.
+        jinja2 (bool): Install Jinja2 too. Default is False.
+        assets (bool): Install WhiteNoise and the asset build dependencies too. Default is False.
+        asgi (bool): Install gunicorn and uvicorn too. Default is False.
+    """
+    wheelhouse = wheelhouse or Wheelhouse()
+    requirements = project_requirements(
+        dbType, htmx, dbPooling, cache, jinja2, assets, asgi)
+
+    if clone:
+        start = time.monotonic()
+        method = GoldenVenvs(wheelhouse=wheelhouse).clone(
+            requirements, venvPath, logger)
+        logger.log_info(
+            f"Virtual environment cloned in '{venvPath}' ({method}) in {time.monotonic() - start:.2f}s.")
+        return
+
+    # Build the wheels with the interpreter the venv is created from, they are for the same Python.
+    wheelhouse.ensure(requirements, sys.executable, logger)
+
+    venv.EnvBuilder(with_pip=True).create(venvPath)
+    logger.log_info(f"Virtual environment created in '{venvPath}'.")
+
+    wheelhouse.install(requirements, venv_python(venvPath), logger)
+
+
+if __name__ == "__main__":
+    # venvsetup.py <venv path> <database type> <htmx> [clone] [pooling: false, app or pgbouncer] [cache: false or a backend] [jinja2] [assets] [asgi]
+    from logger import Logger
+
+    venvPath, dbType, htmx = sys.argv[1], sys.argv[2], sys.argv[3] == "true"
+    clone = len(sys.argv) > 4 and sys.argv[4] == "true"
+    dbPooling = len(sys.argv) > 5 and sys.argv[5] != "false"
+    cache = sys.argv[6] if len(sys.argv) > 6 and sys.argv[6] != "false" else ''
+    jinja2 = len(sys.argv) > 7 and sys.argv[7] == "true"
+    assets = len(sys.argv) > 8 and sys.argv[8] == "true"
+    asgi = len(sys.argv) > 9 and sys.argv[9] == "true"
+    logger = Logger()
+
+    try:
+        create_venv(venvPath, dbType, htmx, logger,
+                    clone=clone, dbPooling=dbPooling, cache=cache, jinja2=jinja2, assets=assets, asgi=asgi)
+    except Exception as e:
+        logger.log_error(f"Failed to set up the virtual environment: {e}")
+        sys.exit(1)
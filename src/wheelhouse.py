@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import sysconfig
+import time
+from const import WHEELHOUSE_MAX_SIZE, WHEELHOUSE_RESOLVE_MAX_AGE
+from utils import get_cache_dir, atomic_write
+
+
+class Wheelhouse:
+    def __init__(self, cacheDir: str = None, maxSize: int = WHEELHOUSE_MAX_SIZE,
+                 resolveMaxAge: float = WHEELHOUSE_RESOLVE_MAX_AGE):
+        """
+        Local cache of built wheels, one directory per resolved requirement set and Python version.
+
+        A requirement set is resolved to pinned versions with 'pip install --dry-run --report',
+        and the resolution is reused for 'resolveMaxAge' seconds. The first install of a resolved
+        set builds its wheels with 'pip wheel', later installs run 'pip install --no-index' against
+        that directory, fully offline. Once the resolution expires, a new release (e.g. a Django
+        security release) resolves to a new set, built once in turn. Without the index, the last
+        resolution is used whatever its age. The least recently used sets are evicted when the
+        cache grows over 'maxSize' bytes.
+
+        Args:
+            cacheDir (str): Root of the cache. Default is '<get_cache_dir()>/wheelhouse'.
+            maxSize (int): Size in bytes the cache is trimmed to. Default is 'WHEELHOUSE_MAX_SIZE'.
+            resolveMaxAge (float): Seconds a resolution is reused, 0 to resolve on every install.
+                Default is 'WHEELHOUSE_RESOLVE_MAX_AGE'.
+        """
+        self.cacheDir = cacheDir or os.path.join(get_cache_dir(), 'wheelhouse')
+        self.maxSize = maxSize
+        self.resolveMaxAge = resolveMaxAge
+
+    @staticmethod
+    def _python_tag(python: str) -> str:
+        if python == sys.executable:
+            return f"{sys.implementation.cache_tag} {sysconfig.get_platform()}"
+
+        return subprocess.run([python, '-c', 'import sys, sysconfig; print(sys.implementation.cache_tag, sysconfig.get_platform())'],
+                              check=True, capture_output=True, text=True).stdout.strip()
+
+    @staticmethod
+    def _hash(tag: str, requirements: list) -> str:
+        digest = hashlib.sha256(tag.encode())
+        for requirement in sorted(requirement.strip().lower() for requirement in requirements):
+            digest.update(f"\0{requirement}".encode())
+        return digest.hexdigest()[:16]
+
+    def resolve(self, requirements: list, python: str = sys.executable) -> list:
+        """
+        Return the 'name==version' pins 'requirements' resolve to for 'python', dependencies included.
+
+        The resolution is kept in '<cacheDir>/resolutions' and reused while it's younger than 'resolveMaxAge'.
+        """
+        tag = self._python_tag(python)
+        resolutionPath = os.path.join(
+            self.cacheDir, 'resolutions', f"{self._hash(tag, requirements)}.json")
+
+        try:
+            with open(resolutionPath, 'r') as f:
+                resolution = json.load(f)
+        except (OSError, ValueError):
+            resolution = None
+
+        if resolution is not None and time.time() - resolution['time'] < self.resolveMaxAge:
+            return resolution['pins']
+
+        try:
+            report = subprocess.run([python, '-m', 'pip', 'install', '--dry-run', '--ignore-installed', '--quiet',
+                                     '--report', '-', *requirements], check=True, capture_output=True, text=True).stdout
+        except subprocess.CalledProcessError:
+            # Offline or the index is down, the last resolution still installs.
+            if resolution is not None:
+                return resolution['pins']
+            raise
+
+        pins = sorted(f"{package['metadata']['name']}=={package['metadata']['version']}"
+                      for package in json.loads(report)['install'])
+
+        os.makedirs(os.path.dirname(resolutionPath), exist_ok=True)
+        atomic_write(resolutionPath, json.dumps(
+            {'time': time.time(), 'requirements': requirements, 'pins': pins}, indent=2))
+        return pins
+
+    def key(self, requirements: list, python: str = sys.executable) -> str:
+        """Hash of the resolved requirement set and of the Python version and platform the wheels are built for."""
+        return self._hash(self._python_tag(python), self.resolve(requirements, python))
+
+    def path(self, requirements: list, python: str = sys.executable) -> str:
+        return os.path.join(self.cacheDir, self.key(requirements, python))
+
+    def ensure(self, requirements: list, python: str = sys.executable, logger=None) -> str:
+        """
+        Make sure the wheels of 'requirements' are in the cache, building them if needed.
+
+        Returns:
+            str: The directory holding the wheels and the resolved 'requirements.lock'.
+        """
+        pins = self.resolve(requirements, python)
+        wheelDir = os.path.join(self.cacheDir, self._hash(
+            self._python_tag(python), pins))
+        lockPath = os.path.join(wheelDir, 'requirements.lock')
+
+        if os.path.exists(lockPath):
+            # The lock's mtime is the last use, for the LRU eviction.
+            os.utime(lockPath)
+            return wheelDir
+
+        os.makedirs(self.cacheDir, exist_ok=True)
+        tmpDir = f"{wheelDir}.{os.getpid()}.tmp"
+        shutil.rmtree(tmpDir, ignore_errors=True)
+
+        if logger is not None:
+            logger.log_info(
+                "Building the wheelhouse, this is only done once per dependency set....")
+
+        try:
+            subprocess.run([python, '-m', 'pip', 'wheel', '--quiet', '--wheel-dir', tmpDir, *pins],
+                           check=True)
+
+            # The offline install pins the resolved versions.
+            atomic_write(os.path.join(tmpDir, 'requirements.lock'),
+                         ''.join(f"{pin}\n" for pin in pins))
+
+            try:
+                os.rename(tmpDir, wheelDir)
+            except OSError:
+                # Another run built the same set first, use theirs.
+                shutil.rmtree(tmpDir, ignore_errors=True)
+
+        except BaseException:
+            shutil.rmtree(tmpDir, ignore_errors=True)
+            raise
+
+        self.evict(keep=wheelDir)
+        return wheelDir
+
+    def install(self, requirements: list, python: str = sys.executable, logger=None) -> None:
+        """
+        Install 'requirements' into the environment of 'python', offline from the cache.
+
+        Args:
+            requirements (list): Requirement specifiers, e.g. ['Django', 'django-environ'].
+            python (str): Interpreter of the target environment. Default is the current one.
+            logger (Logger): Logger instance. Optional.
+        """
+        wheelDir = self.ensure(requirements, python, logger)
+
+        subprocess.run([python, '-m', 'pip', 'install', '--quiet', '--no-index', '--find-links', wheelDir,
+                        '-r', os.path.join(wheelDir, 'requirements.lock')], check=True)
+
+        if logger is not None:
+            logger.log_info(
+                f"Installed {len(requirements)} requirements offline from the wheelhouse.")
+
+    def evict(self, keep: str = None) -> list:
+        """
+        Remove the least recently used requirement sets until the cache fits in 'maxSize'.
+
+        Args:
+            keep (str): A set directory never to remove, like the one just built.
+
+        Returns:
+            list: The removed directories.
+        """
+        entries = []
+        totalSize = 0
+
+        for name in os.listdir(self.cacheDir):
+            wheelDir = os.path.join(self.cacheDir, name)
+            lockPath = os.path.join(wheelDir, 'requirements.lock')
+            if not os.path.exists(lockPath):
+                continue  # Being built by another run, or the resolutions
+
+            size = sum(entry.stat().st_size for entry in os.scandir(wheelDir))
+            entries.append((os.stat(lockPath).st_mtime, size, wheelDir))
+            totalSize += size
+
+        removed = []
+        for _, size, wheelDir in sorted(entries):
+            if totalSize <= self.maxSize:
+                break
+            if wheelDir == keep:
+                continue
+
+            shutil.rmtree(wheelDir, ignore_errors=True)
+            totalSize -= size
+            removed.append(wheelDir)
+
+        return removed